@@ -0,0 +1,218 @@
+"""
+Actor-learner training pipeline.
+
+Several actor processes generate self-play games with a read-only copy of the
+policy (a FrozenPolicy per side plus the current epsilon) and send them, packed as
+game records, over a bounded queue. A single learner (the main process) replays
+every game into the authoritative QLearningAgent tables and periodically publishes
+a fresh policy copy to the actors.
+
+    python actor_learner.py --episodes 50000 --actors 4 --refresh-every 2000 --queue-depth 32
+"""
+
+import multiprocessing as mp
+import queue
+import random
+import time
+from itertools import islice
+
+from agent import QLearningAgent
+from gamerecord import iter_packed, pack_game
+from game import TicTacToe
+from league import FrozenPolicy
+from train import EPISODES, EPSILON_DECAY, MIN_EPSILON, replay_game, side_paths
+from utils import make_state_key
+
+NUM_ACTORS = 4
+BATCH_SIZE = 64
+QUEUE_DEPTH = 32
+REFRESH_EVERY = 2000
+
+
+def actor_loop(actor_id, games_out, policy_in, stop, batch_size, seed, generated, busy, run_time):
+    """
+    Generate self-play games with the latest published policy (runs in an actor process).
+    generated, busy and run_time are shared arrays with one slot per actor: games
+    played, seconds spent playing them and seconds since start.
+    """
+    random.seed(seed)
+    env = TicTacToe()
+    version, epsilon, policies = -1, 1.0, None
+    start = time.perf_counter()
+
+    while not stop.is_set():
+        # adopt the newest policy copy, if any was published
+        try:
+            while True:
+                version, epsilon, policy_X, policy_O = policy_in.get_nowait()
+                policies = {1: FrozenPolicy(policy_X), -1: FrozenPolicy(policy_O)}
+        except queue.Empty:
+            pass
+
+        t = time.perf_counter()
+        batch = bytearray()
+        for _ in range(batch_size):
+            env.reset()
+            done = False
+            while not done:
+                legal = env.legal_actions()
+                if policies is None or random.random() < epsilon:
+                    action = random.choice(legal)
+                else:
+                    state_key = make_state_key(tuple(env.board), env.current_player)
+                    action = policies[env.current_player].get_action(state_key, legal)
+                _, _, done, _ = env.step(action)
+            batch += pack_game(env.history, env.winner)
+        # counted before sending, so batches dropped at stop are included
+        generated[actor_id] += batch_size
+        busy[actor_id] += time.perf_counter() - t
+        run_time[actor_id] = time.perf_counter() - start
+
+        while not stop.is_set():
+            try:
+                games_out.put((actor_id, version, batch_size, bytes(batch)), timeout=0.1)
+                break
+            except queue.Full:
+                continue
+    run_time[actor_id] = time.perf_counter() - start
+    # batches still buffered when the learner stops are dropped rather than flushed at exit
+    games_out.cancel_join_thread()
+
+
+def train_actor_learner(episodes=EPISODES, save_path="qtable.pkl", num_actors=NUM_ACTORS, batch_size=BATCH_SIZE,
+                        queue_depth=QUEUE_DEPTH, refresh_every=REFRESH_EVERY, alpha=0.5, gamma=0.99,
+                        epsilon_decay=EPSILON_DECAY, min_epsilon=MIN_EPSILON, log_every=5000):
+    agents = {1: QLearningAgent(alpha=alpha, gamma=gamma, epsilon=1.0),
+              -1: QLearningAgent(alpha=alpha, gamma=gamma, epsilon=1.0)}
+    env = TicTacToe()
+
+    games = mp.Queue(maxsize=queue_depth)
+    policy_queues = [mp.Queue(maxsize=2) for _ in range(num_actors)]
+    stop = mp.Event()
+    # per-actor throughput counters; every actor writes only its own slot
+    generated = mp.Array("q", num_actors, lock=False)
+    busy = mp.Array("d", num_actors, lock=False)
+    run_time = mp.Array("d", num_actors, lock=False)
+    actors = [mp.Process(target=actor_loop, args=(i, games, policy_queues[i], stop, batch_size, random.randrange(2 ** 31),
+                                                  generated, busy, run_time),
+                         daemon=True)
+              for i in range(num_actors)]
+
+    version = 0
+    # learner episode count at which each policy version was published
+    published_at = {0: 0}
+
+    def publish():
+        epsilon = agents[1].epsilon
+        policy_X = FrozenPolicy.from_agent(agents[1]).actions
+        policy_O = FrozenPolicy.from_agent(agents[-1]).actions
+        for q in policy_queues:
+            try:
+                q.put_nowait((version, epsilon, policy_X, policy_O))
+            except queue.Full:
+                pass  # the actor still has an unread policy; it will catch up on the next refresh
+
+    print(f"=== Starting actor-learner training ({num_actors} actors) ===")
+    publish()
+    for actor in actors:
+        actor.start()
+
+    learned = received = 0
+    lag_versions = lag_episodes = batches = 0
+    max_lag = 0
+    start = time.time()
+    learn_time = 0.0
+    next_refresh = refresh_every
+    next_log = 0
+
+    try:
+        while learned < episodes:
+            actor_id, actor_version, count, data = games.get()
+            received += count
+            t = time.perf_counter()
+            batch_start = learned
+            # the last batch is cut off at the episode budget
+            for game in islice(iter_packed(data), episodes - learned):
+                replay_game(env, agents, game.moves)
+                learned += 1
+                for agent in agents.values():
+                    agent.epsilon = max(min_epsilon, agent.epsilon * epsilon_decay)
+            learn_time += time.perf_counter() - t
+
+            # policy lag: how far behind the learner the batch's policy was
+            if actor_version >= 0:
+                lag = batch_start - published_at[actor_version]
+                lag_versions += version - actor_version
+                lag_episodes += lag
+                max_lag = max(max_lag, lag)
+                batches += 1
+
+            if learned >= next_refresh:
+                version += 1
+                published_at[version] = learned
+                publish()
+                next_refresh += refresh_every
+
+            if log_every and learned >= next_log:
+                elapsed = max(time.time() - start, 1e-9)
+                print(f"Episode {learned}/{episodes} | eps={agents[1].epsilon:.3f} | policy v{version} | "
+                      f"{learned / elapsed:.0f} ep/s")
+                next_log += log_every
+    finally:
+        stop.set()
+        # drain so blocked actors can exit
+        try:
+            while True:
+                games.get_nowait()
+        except (queue.Empty, OSError):
+            pass
+        for actor in actors:
+            actor.join(timeout=2)
+            if actor.is_alive():
+                actor.terminate()
+        # unread policy copies would otherwise block interpreter exit
+        for q in policy_queues:
+            q.cancel_join_thread()
+
+    elapsed = max(time.time() - start, 1e-9)
+    print(f"Learner: {learned} episodes in {elapsed:.1f}s ({learned / elapsed:.0f} ep/s overall, "
+          f"{learned / max(learn_time, 1e-9):.0f} ep/s while updating, busy {learn_time / elapsed * 100:.0f}%)")
+    actor_time = max(max(run_time), 1e-9)
+    total = sum(generated)
+    print(f"Actors:  {total} games in {actor_time:.1f}s ({total / actor_time:.0f} games/s from {num_actors} actors, "
+          f"{total / max(sum(busy), 1e-9):.0f} games/s per actor while playing, "
+          f"busy {sum(busy) / (actor_time * num_actors) * 100:.0f}%); "
+          f"{received} received, {total - learned} not learned")
+    if batches:
+        print(f"Policy lag: {lag_versions / batches:.2f} versions / {lag_episodes / batches:.0f} episodes on average, "
+              f"max {max_lag} episodes")
+
+    if save_path:
+        path_X, path_O = side_paths(save_path)
+        agents[1].save(path_X)
+        agents[-1].save(path_O)
+
+    print("Actor-learner training completed.")
+    return agents[1], agents[-1]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Actor-learner self-play training')
+    parser.add_argument('--episodes', type=int, default=EPISODES, help='Number of episodes to learn from')
+    parser.add_argument('--actors', type=int, default=NUM_ACTORS, help='Number of actor processes')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Games per message from an actor')
+    parser.add_argument('--queue-depth', type=int, default=QUEUE_DEPTH, help='Maximum batches in flight')
+    parser.add_argument('--refresh-every', type=int, default=REFRESH_EVERY, help='Learner episodes between policy refreshes')
+    parser.add_argument('--output', type=str, default='qtable.pkl', help='Base output path (X/O tables get _X/_O suffixes)')
+    parser.add_argument('--alpha', type=float, default=0.5, help='Learning rate')
+    parser.add_argument('--gamma', type=float, default=0.99, help='Discount factor')
+    parser.add_argument('--epsilon-decay', type=float, default=EPSILON_DECAY, help='Per-episode epsilon decay')
+    parser.add_argument('--min-epsilon', type=float, default=MIN_EPSILON, help='Epsilon floor')
+    args = parser.parse_args()
+
+    train_actor_learner(episodes=args.episodes, save_path=args.output, num_actors=args.actors,
+                        batch_size=args.batch_size, queue_depth=args.queue_depth,
+                        refresh_every=args.refresh_every, alpha=args.alpha, gamma=args.gamma,
+                        epsilon_decay=args.epsilon_decay, min_epsilon=args.min_epsilon)
@@ -1,14 +1,84 @@
-import random, pickle
+import math, random, pickle, struct
+from array import array
 from collections import defaultdict
 from typing import Tuple, List
 
+from utils import canonical_state, encode_state, decode_state
+from value_agent import ZIP_MAGIC, ValueNetworkAgent
+
+# Quantized table format: header, then per state a uint16 state code, a uint16
+# action bitmask and one quantized value per set bit.
+QUANT_MAGIC = b"QTQ1"
+QUANT_HEADER = struct.Struct("<4sBBxxddI")  # magic, dtype, flags, scale, offset, state count
+QUANT_FOLDED = 1  # flags bit: the table holds canonical (symmetry-folded) states only
+QUANT_DTYPES = {"float16": (1, "e", 2), "int8": (2, "b", 1)}
+# Afterstate value tables: magic, then a pickled {board: value} dict
+AFTERSTATE_MAGIC = b"TTTA"
+# Learning-rate schedules: fixed alpha, or alpha = 1 / n^omega for the n-th visit
+ALPHA_SCHEDULES = ("constant", "visits")
+NUM_STATES = 2 * 3 ** 9
+
+
+class VisitCounts:
+    """Per-(state, action) visit counters in one flat uint32 array indexed by encode_state(s) * 9 + a."""
+
+    __slots__ = ("counts",)
+
+    def __init__(self, counts: array = None):
+        self.counts = counts if counts is not None else array("I", bytes(4 * NUM_STATES * 9))
+
+    def get(self, state_key: Tuple, action: int) -> int:
+        return self.counts[encode_state(state_key) * 9 + action]
+
+    def increment(self, state_key: Tuple, action: int) -> int:
+        i = encode_state(state_key) * 9 + action
+        self.counts[i] += 1
+        return self.counts[i]
+
+    def row(self, state_key: Tuple) -> dict:
+        base = encode_state(state_key) * 9
+        return {a: n for a, n in enumerate(self.counts[base:base + 9]) if n}
+
+    def to_sparse(self) -> dict:
+        """Nonzero counters as two packed uint32 arrays (index, count); small enough to pickle."""
+        index = array("I", (i for i, n in enumerate(self.counts) if n))
+        return {"index": index.tobytes(), "count": array("I", (self.counts[i] for i in index)).tobytes()}
+
+    @classmethod
+    def from_sparse(cls, data: dict) -> "VisitCounts":
+        visits = cls()
+        index, count = array("I"), array("I")
+        index.frombytes(data["index"])
+        count.frombytes(data["count"])
+        for i, n in zip(index, count):
+            visits.counts[i] = n
+        return visits
+
+
 class QLearningAgent:
-    def __init__(self, alpha=0.5, gamma=0.99, epsilon=1.0):
+    def __init__(self, alpha=0.5, gamma=0.99, epsilon=1.0, alpha_schedule="constant", omega=0.7,
+                 exploration_bonus=0.0, count_visits=False):
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
         # Q[state_key][action] = value
         self.Q = defaultdict(lambda: defaultdict(float))
+        # optional book.Book of solved positions, consulted before the Q-table
+        self.book = None
+        # True for tables written by compact.py --fold-symmetries: only canonical states
+        # are stored, and reads and writes go through the canonical variant
+        self.folded = False
+        if alpha_schedule not in ALPHA_SCHEDULES:
+            raise ValueError(f"Unknown alpha schedule {alpha_schedule!r} (choose from {', '.join(ALPHA_SCHEDULES)})")
+        self.alpha_schedule = alpha_schedule
+        self.omega = omega
+        self.exploration_bonus = exploration_bonus
+        # visit counters are kept when asked for or when a schedule needs them
+        needs_counts = count_visits or alpha_schedule != "constant" or exploration_bonus > 0
+        self.counts = VisitCounts() if needs_counts else None
+
+    def start_episode(self):
+        """Called by the training loops before every episode; plain Q-learning keeps no episode state."""
 
     def get_action(self, state_key: Tuple, legal: List[int], training=True) -> int:
         # legal should be list of ints
@@ -16,30 +86,143 @@ class QLearningAgent:
             raise ValueError("No legal actions provided")
         if training and random.random() < self.epsilon:
             return random.choice(legal)
+        if self.book is not None:
+            solved = self.book.best_actions(state_key, legal)
+            if solved:
+                return random.choice(solved)
+        if training and self.exploration_bonus > 0:
+            return random.choice(self.optimistic_actions(state_key, legal))
         # pick best action among legal ones
-        qvals = [(self.Q[state_key][a], a) for a in legal]
+        return random.choice(self.greedy_actions(state_key, legal))
+
+    def optimistic_actions(self, state_key: Tuple, legal: List[int]) -> List[int]:
+        """Best actions by Q-value plus a count-based bonus c / sqrt(n + 1)."""
+        row = self.q_values(state_key)
+        scores = [(row.get(a, 0.0) + self.exploration_bonus / math.sqrt(self.visit_count(state_key, a) + 1), a)
+                  for a in legal]
+        best = max(scores)[0]
+        return [a for score, a in scores if score == best]
+
+    def step_size(self, state_key: Tuple, action: int) -> float:
+        """Learning rate for an entry under the agent's alpha schedule."""
+        if self.alpha_schedule == "visits":
+            return 1.0 / max(self.visit_count(state_key, action), 1) ** self.omega
+        return self.alpha
+
+    def visit_count(self, state_key: Tuple, action: int) -> int:
+        return self.counts.get(state_key, action)
+
+    def count_visit(self, state_key: Tuple, action: int):
+        if self.counts is not None:
+            self.counts.increment(state_key, action)
+
+    def greedy_actions(self, state_key: Tuple, legal: List[int]) -> List[int]:
+        """All legal actions sharing the highest Q-value."""
+        row = self.q_values(state_key)
+        qvals = [(row.get(a, 0.0), a) for a in legal]
         max_q = max(qvals, key=lambda x: x[0])[0]
-        best = [a for q,a in qvals if q == max_q]
-        return random.choice(best)
+        return [a for q,a in qvals if q == max_q]
+
+    def q_values(self, state_key: Tuple) -> dict:
+        """
+        Read-only action map of a state; never inserts into the table.
+        Folded tables are read through the state's canonical variant.
+        """
+        if not self.folded:
+            return self.Q.get(state_key, {})
+        canonical, perm = canonical_state(state_key)
+        row = self.Q.get(canonical)
+        if row is None:
+            return {}
+        # action i of the canonical board is action perm[i] of the original one
+        return {perm[i]: q for i, q in row.items()}
+
+    def table_entry(self, state_key: Tuple, action: int) -> Tuple:
+        """(state, action) under which an entry is stored: itself, or its canonical variant in a folded table."""
+        if not self.folded:
+            return state_key, action
+        canonical, perm = canonical_state(state_key)
+        return canonical, perm.index(action)
 
     def update(self, state_key, action, reward, next_state_key, next_legal, done):
+        state_key, action = self.table_entry(state_key, action)
+        self.count_visit(state_key, action)
         q_old = self.Q[state_key][action]
         target = reward
         if not done:
             # best next-state q
-            best_next = 0 if not next_legal else max(self.Q[next_state_key][a] for a in next_legal)
+            if next_legal:
+                next_row = self.q_values(next_state_key)
+                best_next = max(next_row.get(a, 0.0) for a in next_legal)
+            else:
+                best_next = 0
             target += self.gamma * best_next
-        self.Q[state_key][action] += self.alpha * (target - q_old)
+        td_error = target - q_old
+        self.Q[state_key][action] += self.step_size(state_key, action) * td_error
+        return td_error
 
     def save(self, path):
         # convert nested defaultdicts to normal dicts for pickle
         raw = {s: dict(a) for s,a in self.Q.items()}
         with open(path, "wb") as f:
             pickle.dump(raw, f)
+            self._save_extra(f)
+
+    def _save_extra(self, f):
+        # visit counts and the folded flag follow the table as a second pickle object;
+        # older readers stop after the first
+        extra = {}
+        if self.counts is not None:
+            extra["visit_counts"] = self.counts.to_sparse()
+        if self.folded:
+            extra["folded"] = True
+        if extra:
+            pickle.dump(extra, f)
+
+    def _load_extra(self, f):
+        try:
+            extra = pickle.load(f)
+        except EOFError:
+            return
+        if not isinstance(extra, dict):
+            return
+        if "visit_counts" in extra:
+            self.counts = VisitCounts.from_sparse(extra["visit_counts"])
+        self.folded = extra.get("folded", False)
+
+    def save_quantized(self, path, dtype="int8"):
+        """
+        Save the table with quantized values: 'float16', or 'int8' with a per-table
+        symmetric scale (q = scale * code). The scale keeps offset 0 so that a stored
+        0.0 decodes to exactly 0.0 and ties with missing entries survive.
+        """
+        dtype_id, fmt, _ = QUANT_DTYPES[dtype]
+        rows = [(encode_state(s), amap) for s, amap in self.Q.items() if amap]
+        offset, scale = 0.0, 1.0
+        if dtype == "int8":
+            scale = max((abs(q) for _, amap in rows for q in amap.values()), default=0.0) / 127 or 1.0
+
+        with open(path, "wb") as f:
+            flags = QUANT_FOLDED if self.folded else 0
+            f.write(QUANT_HEADER.pack(QUANT_MAGIC, dtype_id, flags, scale, offset, len(rows)))
+            for code, amap in sorted(rows):
+                actions = sorted(amap)
+                mask = sum(1 << a for a in actions)
+                qs = [amap[a] for a in actions]
+                if dtype == "int8":
+                    qs = [max(-127, min(127, round((q - offset) / scale))) for q in qs]
+                f.write(struct.pack(f"<HH{len(qs)}{fmt}", code, mask, *qs))
 
     def load(self, path):
         with open(path, "rb") as f:
+            if f.read(len(QUANT_MAGIC)) == QUANT_MAGIC:
+                f.seek(0)
+                self.Q, flags = self._read_quantized(f)
+                self.folded = bool(flags & QUANT_FOLDED)
+                return
+            f.seek(0)
             raw = pickle.load(f)
+            self._load_extra(f)
         # restore to defaultdict structure
         dd = defaultdict(lambda: defaultdict(float))
         for s, amap in raw.items():
@@ -47,3 +230,205 @@ class QLearningAgent:
             inner.update(amap)
             dd[s] = inner
         self.Q = dd
+
+    @staticmethod
+    def _read_quantized(f):
+        flags, rows = QLearningAgent._iter_quantized(f)
+        dd = defaultdict(lambda: defaultdict(float))
+        for state_key, amap in rows:
+            inner = defaultdict(float)
+            inner.update(amap)
+            dd[state_key] = inner
+        return dd, flags
+
+    @staticmethod
+    def _iter_quantized(f):
+        """Read a quantized header; return its flags and an iterator of (state_key, {action: q}) rows."""
+        _, dtype_id, flags, scale, offset, count = QUANT_HEADER.unpack(f.read(QUANT_HEADER.size))
+        fmt, size = next((fmt, size) for i, fmt, size in QUANT_DTYPES.values() if i == dtype_id)
+        data = f.read()
+
+        def rows():
+            pos = 0
+            for _ in range(count):
+                code, mask = struct.unpack_from("<HH", data, pos)
+                pos += 4
+                actions = [a for a in range(9) if mask >> a & 1]
+                qs = struct.unpack_from(f"<{len(actions)}{fmt}", data, pos)
+                pos += len(actions) * size
+                yield decode_state(code), {a: offset + scale * q for a, q in zip(actions, qs)}
+
+        return flags, rows()
+
+    def table_size(self) -> int:
+        """Number of stored states."""
+        return len(self.Q)
+
+    def value_count(self) -> int:
+        """Number of stored values (state-action entries)."""
+        return sum(len(row) for row in self.Q.values())
+
+    def policy_flips(self, other: "QLearningAgent", states=None) -> int:
+        """Number of states (default: all in this table) whose greedy action set differs in `other`."""
+        flips = 0
+        for state_key in (list(self.Q) if states is None else states):
+            legal = [a for a, v in enumerate(state_key[0]) if v == 0]
+            if legal and set(self.greedy_actions(state_key, legal)) != set(other.greedy_actions(state_key, legal)):
+                flips += 1
+        return flips
+
+
+class QLambdaAgent(QLearningAgent):
+    """
+    Watkins' Q(lambda): every update also moves all state-action pairs visited
+    earlier in the episode, weighted by their eligibility trace, so a terminal
+    reward reaches the whole move sequence at once. Traces are a small dict of the
+    pairs visited in the current episode; they are cleared at episode start and cut
+    after exploratory (non-greedy) moves. Saved tables are plain Q-tables.
+    """
+
+    def __init__(self, alpha=0.5, gamma=0.99, epsilon=1.0, lam=0.8, trace_cutoff=1e-3, **options):
+        super().__init__(alpha, gamma, epsilon, **options)
+        self.lam = lam
+        self.trace_cutoff = trace_cutoff
+        self.traces = {}
+
+    def start_episode(self):
+        self.traces.clear()
+
+    def get_action(self, state_key: Tuple, legal: List[int], training=True) -> int:
+        action = super().get_action(state_key, legal, training)
+        if training and self.traces and action not in self.greedy_actions(state_key, legal):
+            # the return after an exploratory move says nothing about the greedy policy
+            self.traces.clear()
+        return action
+
+    def update(self, state_key, action, reward, next_state_key, next_legal, done):
+        state_key, action = self.table_entry(state_key, action)
+        self.count_visit(state_key, action)
+        target = reward
+        if not done and next_legal:
+            next_row = self.q_values(next_state_key)
+            target += self.gamma * max(next_row.get(a, 0.0) for a in next_legal)
+        td_error = target - self.Q[state_key][action]
+
+        # replacing traces
+        self.traces[(state_key, action)] = 1.0
+        decay = self.gamma * self.lam
+        constant = self.alpha_schedule == "constant"
+        for pair, trace in list(self.traces.items()):
+            s, a = pair
+            alpha = self.alpha if constant else self.step_size(s, a)
+            self.Q[s][a] += alpha * td_error * trace
+            trace *= decay
+            if trace < self.trace_cutoff:
+                del self.traces[pair]
+            else:
+                self.traces[pair] = trace
+
+        if done:
+            self.traces.clear()
+        return td_error
+
+
+class AfterstateAgent(QLearningAgent):
+    """
+    Learns one value per afterstate, the board right after this agent's move,
+    instead of one value per (state, action). All moves that lead to the same board
+    share that board's value, and moves are chosen by evaluating the board each legal
+    move would produce. Updates follow train()'s Q-learning interface:
+    V(after) += alpha * (reward + gamma * max_a' V(after') - V(after)).
+    Visit counts (alpha schedule, exploration bonus) are kept per afterstate too.
+    """
+
+    def __init__(self, alpha=0.5, gamma=0.99, epsilon=1.0, **options):
+        super().__init__(alpha, gamma, epsilon, **options)
+        # V[board after own move] = value
+        self.V = defaultdict(float)
+
+    @staticmethod
+    def afterstate(state_key: Tuple, action: int) -> Tuple:
+        board, player = state_key
+        return board[:action] + (player,) + board[action + 1:]
+
+    def _counter_entry(self, state_key: Tuple, action: int) -> Tuple:
+        # visits are counted per afterstate, the entry that is actually updated; the
+        # afterstate with its mover is a state key, slot 0 holds its count
+        return (self.afterstate(state_key, action), state_key[1]), 0
+
+    def visit_count(self, state_key: Tuple, action: int) -> int:
+        return self.counts.get(*self._counter_entry(state_key, action))
+
+    def count_visit(self, state_key: Tuple, action: int):
+        if self.counts is not None:
+            self.counts.increment(*self._counter_entry(state_key, action))
+
+    def q_values(self, state_key: Tuple) -> dict:
+        """Action values of a state: the value of each legal move's afterstate (read-only)."""
+        board, player = state_key
+        values = {}
+        for a, v in enumerate(board):
+            if v == 0:
+                after = board[:a] + (player,) + board[a + 1:]
+                if after in self.V:
+                    values[a] = self.V[after]
+        return values
+
+    def update(self, state_key, action, reward, next_state_key, next_legal, done):
+        self.count_visit(state_key, action)
+        after = self.afterstate(state_key, action)
+        target = reward
+        if not done and next_legal:
+            next_values = self.q_values(next_state_key)
+            target += self.gamma * max(next_values.get(a, 0.0) for a in next_legal)
+        td_error = target - self.V[after]
+        self.V[after] += self.step_size(state_key, action) * td_error
+        return td_error
+
+    def table_size(self) -> int:
+        return len(self.V)
+
+    value_count = table_size
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(AFTERSTATE_MAGIC)
+            pickle.dump(dict(self.V), f)
+            self._save_extra(f)
+
+    def save_quantized(self, path, dtype="int8"):
+        raise ValueError("afterstate value tables cannot be quantized; quantized export is for Q-tables only")
+
+    def load(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(AFTERSTATE_MAGIC)) != AFTERSTATE_MAGIC:
+                raise ValueError(f"{path} is not an afterstate value table")
+            self.V = defaultdict(float, pickle.load(f))
+            self._load_extra(f)
+
+
+AGENT_TYPES = {"q": QLearningAgent, "qlambda": QLambdaAgent, "afterstate": AfterstateAgent,
+               "value": ValueNetworkAgent}
+
+
+def make_agent(agent_type="q", **options) -> QLearningAgent:
+    """Create a learning agent by name (see AGENT_TYPES); options go to its constructor."""
+    try:
+        cls = AGENT_TYPES[agent_type]
+    except KeyError:
+        raise ValueError(f"Unknown agent type {agent_type!r} (choose from {', '.join(AGENT_TYPES)})") from None
+    return cls(**options)
+
+
+def load_agent(path, epsilon=0.0) -> QLearningAgent:
+    """Load a saved table of any supported format into the matching agent class."""
+    with open(path, "rb") as f:
+        magic = f.read(len(AFTERSTATE_MAGIC))
+    if magic == ZIP_MAGIC:
+        agent = ValueNetworkAgent(epsilon=epsilon)
+    elif magic == AFTERSTATE_MAGIC:
+        agent = AfterstateAgent(epsilon=epsilon)
+    else:
+        agent = QLearningAgent(epsilon=epsilon)
+    agent.load(path)
+    return agent
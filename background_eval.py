@@ -0,0 +1,151 @@
+"""
+Periodic evaluation of training snapshots in background processes.
+
+Every `every` episodes the training loop hands its live agents to
+BackgroundEvaluator.step(). The evaluator forks a child process: the fork is the
+snapshot (copy-on-write, nothing is pickled or copied up front), and the child
+plays the evaluation matches while training continues. Results come back over a
+queue and are picked up by later step() calls, which print them into the training
+log and, with a runlog.Run, record them as metrics.
+
+Each snapshot plays against the random player, optionally the perfect player, and
+the best snapshot so far. Its score is the mean points against random (and
+perfect). A snapshot that beats the best score so far is saved to the best-model
+paths, so a run keeps its best tables and not only its last ones. Without
+best-model paths the best snapshot is kept in a temporary directory that lives as
+long as the evaluator, so later snapshots are still matched against it.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import tempfile
+import time
+
+from evaluate import evaluate, match_points
+from players import PerfectPlayer, RandomPlayer
+
+EVAL_EVERY = 5000
+EVAL_GAMES = 200
+POLL_EVERY = 100  # episodes between checks for finished evaluations
+
+
+def evaluate_snapshot(episode, agent_X, agent_O, games, perfect, best_paths, best_score, results):
+    """Score one snapshot and save it if it is the new best (runs in the forked child)."""
+    start = time.time()
+    random_player = RandomPlayer()
+    scores = {
+        "x_vs_random": match_points(evaluate(agent_X, random_player, games, verbose=False), True),
+        "o_vs_random": match_points(evaluate(random_player, agent_O, games, verbose=False), False),
+    }
+    if perfect:
+        perfect_player = PerfectPlayer()
+        scores["x_vs_perfect"] = match_points(evaluate(agent_X, perfect_player, games, verbose=False), True)
+        scores["o_vs_perfect"] = match_points(evaluate(perfect_player, agent_O, games, verbose=False), False)
+    score = sum(scores.values()) / len(scores)
+
+    if all(os.path.exists(p) for p in best_paths):
+        from agent import load_agent
+        best_X, best_O = (load_agent(p) for p in best_paths)
+        scores["vs_best"] = (match_points(evaluate(agent_X, best_O, games, verbose=False), True)
+                             + match_points(evaluate(best_X, agent_O, games, verbose=False), False)) / 2
+
+    improved = score > best_score
+    if improved:
+        # write next to the target and rename, so the best tables are never half-written
+        for agent, path in zip((agent_X, agent_O), best_paths):
+            agent.save(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+
+    scores["score"] = score
+    results.put((episode, scores, improved, time.time() - start))
+
+
+class BackgroundEvaluator:
+    def __init__(self, every=EVAL_EVERY, games=EVAL_GAMES, perfect=False, best_paths=None, run=None):
+        try:
+            self.ctx = mp.get_context("fork")
+        except ValueError:
+            raise RuntimeError("background evaluation needs the 'fork' start method (Linux/macOS)") from None
+        self.every = every
+        self.games = games
+        self.perfect = perfect
+        # the child loads the best snapshot from disk; without paths to keep it at,
+        # it goes to a temporary directory removed by close()
+        self.keep_best = best_paths is not None
+        self.tmpdir = None
+        if best_paths is None:
+            self.tmpdir = tempfile.mkdtemp(prefix="ttt-best-")
+            best_paths = (os.path.join(self.tmpdir, "best_X.pkl"), os.path.join(self.tmpdir, "best_O.pkl"))
+        self.best_paths = best_paths
+        self.run = run
+        self.results = self.ctx.Queue()
+        self.process = None
+        self.pending = False
+        self.best_score = float("-inf")
+        self.best_episode = None
+        self.history = []
+        self.skipped = 0
+
+    def step(self, episode, agent_X, agent_O):
+        """Called once per training episode; submits snapshots and collects results."""
+        if episode % POLL_EVERY == 0:
+            self.poll()
+        if episode % self.every == 0:
+            self.submit(episode, agent_X, agent_O)
+
+    def submit(self, episode, agent_X, agent_O):
+        if self.process is not None and self.process.is_alive():
+            # one evaluation at a time keeps the learner's CPU share and best-model saves in order
+            self.skipped += 1
+            print(f"[eval] episode {episode}: previous evaluation still running, snapshot skipped")
+            return
+        if self.process is not None:
+            self.process.join()
+            # the next child must start from the latest best score, or it could
+            # overwrite the best tables with a worse snapshot
+            if self.pending and self.process.exitcode == 0:
+                self.poll(block=True)
+        self.process = self.ctx.Process(
+            target=evaluate_snapshot,
+            args=(episode, agent_X, agent_O, self.games, self.perfect, self.best_paths, self.best_score, self.results),
+            daemon=True)
+        self.process.start()
+        self.pending = True
+
+    def poll(self, block=False):
+        while True:
+            try:
+                episode, scores, improved, seconds = self.results.get(block=block)
+            except queue.Empty:
+                return
+            self.pending = False
+            self.report(episode, scores, improved, seconds)
+            if block:
+                return
+
+    def report(self, episode, scores, improved, seconds):
+        self.history.append((episode, scores))
+        improved = improved and scores["score"] > self.best_score
+        if improved:
+            self.best_score, self.best_episode = scores["score"], episode
+        details = " ".join(f"{name}={value:.3f}" for name, value in scores.items() if name != "score")
+        print(f"[eval] episode {episode}: score={scores['score']:.3f} {details} ({seconds:.1f}s)"
+              + (" *best*" if improved else ""))
+        if self.run is not None:
+            self.run.log_metrics(episode, {f"eval_{name}": value for name, value in scores.items()})
+
+    def close(self):
+        """Wait for a running evaluation, report it and remove the temporary best snapshot."""
+        if self.process is not None:
+            self.process.join()
+            if self.pending and self.process.exitcode == 0:
+                self.poll(block=True)
+            self.process = None
+        if self.best_episode is not None:
+            saved = f", saved to {', '.join(self.best_paths)}" if self.keep_best else ""
+            print(f"[eval] best snapshot: episode {self.best_episode} (score {self.best_score:.3f}){saved}")
+        if self.tmpdir is not None:
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+            self.tmpdir = None
@@ -0,0 +1,228 @@
+"""
+Solved opening book and endgame tablebase.
+
+Every reachable, unfinished position with at most `opening` pieces (the opening
+book) or at least `endgame` pieces (the endgame tablebase) is solved exactly once
+and stored in a compact indexed file:
+    header   magic, version, opening plies, endgame plies, entry count
+    codes    uint16 per entry, sorted (utils.encode_state of the position)
+    masks    uint16 per entry, bitmask of the optimal moves
+    values   int8 per entry, game value for the player to move (1 win, 0 draw, -1 loss)
+Lookups are a binary search over the code array. Agents consult the book first and
+fall back to their Q-table for positions it does not cover.
+
+    python book.py build --output book.ttb
+    python book.py stats book.ttb --model qtable_X.pkl
+"""
+
+import os
+import random
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+from game import TicTacToe
+from solver import action_values
+from utils import decode_state, encode_state, make_state_key
+
+BOOK_MAGIC = b"TTTB"
+BOOK_VERSION = 1
+BOOK_HEADER = struct.Struct("<4sBBBxI")  # magic, version, opening, endgame, count
+OPENING_PLIES = 2
+ENDGAME_PLIES = 5
+
+
+def reachable_positions():
+    """All reachable, unfinished positions as (board, player), found by playing out game.TicTacToe."""
+    seen = set()
+    env = TicTacToe()
+
+    def visit(moves):
+        env.reset()
+        for a in moves:
+            env.step(a)
+        state_key = make_state_key(tuple(env.board), env.current_player)
+        if env.done or state_key in seen:
+            return
+        seen.add(state_key)
+        for a in env.legal_actions():
+            visit(moves + [a])
+
+    visit([])
+    return seen
+
+
+class Book:
+    """Read-only solved positions with hit counters."""
+
+    def __init__(self, codes: array, masks: array, values: array, opening=OPENING_PLIES, endgame=ENDGAME_PLIES):
+        self.codes = codes
+        self.masks = masks
+        self.values = values
+        self.opening = opening
+        self.endgame = endgame
+        self.lookups = 0
+        self.hits = 0
+
+    @classmethod
+    def build(cls, opening=OPENING_PLIES, endgame=ENDGAME_PLIES) -> "Book":
+        entries = []
+        for board, player in reachable_positions():
+            pieces = 9 - board.count(0)
+            if opening < pieces < endgame:
+                continue
+            values = action_values(board, player)
+            best = max(values.values())
+            mask = sum(1 << a for a, v in values.items() if v == best)
+            entries.append((encode_state((board, player)), mask, best))
+        entries.sort()
+        return cls(array("H", (e[0] for e in entries)), array("H", (e[1] for e in entries)),
+                   array("b", (e[2] for e in entries)), opening, endgame)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, self.opening, self.endgame, len(self.codes)))
+            for column in (self.codes, self.masks, self.values):
+                f.write(column.tobytes())
+
+    @classmethod
+    def load(cls, path) -> "Book":
+        with open(path, "rb") as f:
+            magic, version, opening, endgame, count = BOOK_HEADER.unpack(f.read(BOOK_HEADER.size))
+            if magic != BOOK_MAGIC or version != BOOK_VERSION:
+                raise ValueError(f"{path} is not an opening book file")
+            columns = []
+            for typecode in ("H", "H", "b"):
+                column = array(typecode)
+                column.frombytes(f.read(count * column.itemsize))
+                columns.append(column)
+        return cls(*columns, opening, endgame)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def lookup(self, state_key: Tuple) -> Optional[Tuple[int, List[int]]]:
+        """(game value, optimal moves) of a covered position, or None."""
+        self.lookups += 1
+        code = encode_state(state_key)
+        i = bisect_left(self.codes, code)
+        if i == len(self.codes) or self.codes[i] != code:
+            return None
+        self.hits += 1
+        mask = self.masks[i]
+        return self.values[i], [a for a in range(9) if mask >> a & 1]
+
+    def best_actions(self, state_key: Tuple, legal: List[int]) -> List[int]:
+        """Optimal moves among `legal`, or [] if the position is not covered."""
+        entry = self.lookup(state_key)
+        if entry is None:
+            return []
+        return [a for a in entry[1] if a in legal]
+
+    def covers(self, state_key: Tuple) -> bool:
+        code = encode_state(state_key)
+        i = bisect_left(self.codes, code)
+        return i < len(self.codes) and self.codes[i] == code
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+def book_stats(book: Book, model_path=None, games=2000, seed=0):
+    """Print hit rate, lookup speed and how much of training the book covers."""
+    from agent import QLearningAgent, load_agent
+    from players import RandomPlayer
+
+    random.seed(seed)
+    print(f"Entries: {len(book)} (opening <= {book.opening} pieces, endgame >= {book.endgame} pieces)")
+
+    # training coverage: Q-updates in random self-play (early training) and in the
+    # trained agent's own self-play (late training) that land on book positions
+    agent = load_agent(model_path) if model_path else QLearningAgent(epsilon=0.0)
+    env = TicTacToe()
+    for name, explore in (("random self-play", 1.0), ("greedy self-play", 0.0)):
+        if explore == 0.0 and not model_path:
+            continue
+        agent.epsilon = explore
+        covered = total = 0
+        for _ in range(games):
+            board = env.reset()
+            done = False
+            while not done:
+                state_key = make_state_key(board, env.current_player)
+                total += 1
+                covered += book.covers(state_key)
+                board, _, done, _ = env.step(agent.get_action(state_key, env.legal_actions(), training=True))
+        print(f"Training updates on book positions ({name}): {covered / total * 100:.1f}% "
+              f"of {total} could be skipped")
+
+    # hit rate while playing: agent with the book vs a random opponent
+    agent.epsilon = 0.0
+    agent.book = book
+    book.lookups = book.hits = 0
+    opponent = RandomPlayer()
+    for game in range(games):
+        board = env.reset()
+        agent_id = 1 if game % 2 == 0 else -1
+        done = False
+        while not done:
+            state_key = make_state_key(board, env.current_player)
+            legal = env.legal_actions()
+            player = agent if env.current_player == agent_id else opponent
+            board, _, done, _ = env.step(player.get_action(state_key, legal, training=False))
+    print(f"Book hit rate in play vs random: {book.hit_rate * 100:.1f}% of {book.lookups} agent moves")
+
+    # lookup speed compared with the model's greedy lookup
+    states = [decode_state(code) for code in book.codes]
+    table = getattr(agent, "Q", None)
+    if table is None:
+        # e.g. a value network: no table whose states could be timed
+        print(f"{model_path} has no Q-table; model lookups are timed on book positions only")
+    else:
+        states += list(table)[:len(states)]
+    random.shuffle(states)
+    legal_of = {s: [a for a, v in enumerate(s[0]) if v == 0] or [0] for s in states}
+    agent.book = None
+    for name, lookup in (("book", lambda s: book.best_actions(s, legal_of[s])),
+                         ("Q-table" if table is not None else "model", lambda s: agent.greedy_actions(s, legal_of[s]))):
+        start = time.perf_counter()
+        for s in states:
+            lookup(s)
+        elapsed = time.perf_counter() - start
+        print(f"{name + ' lookup:':<16} {elapsed / len(states) * 1e6:.2f} us")
+
+    if model_path:
+        agree = 0
+        for i, code in enumerate(book.codes):
+            state_key = decode_state(code)
+            optimal = {a for a in range(9) if book.masks[i] >> a & 1}
+            agree += set(agent.greedy_actions(state_key, legal_of[state_key])) <= optimal
+        print(f"Model greedy moves already optimal on {agree / len(book) * 100:.1f}% of book positions")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Solved opening book and endgame tablebase')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('build', help='Solve and write the book')
+    p.add_argument('--output', type=str, default='book.ttb')
+    p.add_argument('--opening', type=int, default=OPENING_PLIES, help='Cover positions with at most this many pieces')
+    p.add_argument('--endgame', type=int, default=ENDGAME_PLIES, help='Cover positions with at least this many pieces')
+    p = sub.add_parser('stats', help='Hit rate, lookup speed and training coverage')
+    p.add_argument('path')
+    p.add_argument('--model', type=str, default=None, help='Q-table to compare against')
+    p.add_argument('--games', type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        book = Book.build(args.opening, args.endgame)
+        book.save(args.output)
+        print(f"Solved {len(book)} positions in {time.perf_counter() - start:.2f}s, "
+              f"wrote {os.path.getsize(args.output)} bytes to {args.output}")
+    else:
+        book_stats(Book.load(args.path), args.model, args.games)
@@ -0,0 +1,137 @@
+"""
+Q-table pruning and compaction.
+
+Drops entries that carry no information and writes a smaller table:
+- states with an impossible piece count or the wrong player to move
+- terminal boards (they are never queried)
+- actions on occupied cells and exact-zero values (a missing entry reads as 0.0)
+- rows left empty after that
+With --fold-symmetries, the 8 rotations/reflections of a state are merged into one
+canonical entry (values averaged) and the table is marked as folded, so
+QLearningAgent reads and updates every position through its canonical variant.
+If the table was saved with visit counts, --min-visits also drops entries seen fewer
+times, folding weights each variant by its visits, and the counts are carried over.
+
+    python compact.py qtable.pkl --output qtable_compact.pkl [--fold-symmetries] [--min-visits 3]
+"""
+
+import os
+from collections import Counter, defaultdict
+from typing import Dict, Tuple
+
+from agent import QLearningAgent, VisitCounts
+from solver import board_winner
+from utils import canonical_state, encode_state
+
+
+def position_problem(state_key):
+    """Why a state can never be queried in a real game, or None if it can."""
+    board, player = state_key
+    x, o = board.count(1), board.count(-1)
+    if x - o not in (0, 1):
+        return "illegal_piece_count"
+    if player != (1 if x == o else -1):
+        return "wrong_player"
+    if board_winner(board) is not None:
+        return "terminal"
+    return None
+
+
+def compact_table(Q, fold_symmetries=False, visits: VisitCounts = None, min_visits=0) -> Tuple[Dict, Counter]:
+    """Return (compacted raw table, counter of what was dropped)."""
+    stats = Counter()
+    kept = {}
+
+    for state_key, row in Q.items():
+        board = state_key[0]
+        stats["states_in"] += 1
+        stats["entries_in"] += len(row)
+
+        problem = position_problem(state_key)
+        if problem:
+            stats[problem] += 1
+            continue
+
+        new_row = {}
+        for action, q in row.items():
+            if board[action] != 0:
+                stats["illegal_actions"] += 1
+            elif q == 0.0:
+                stats["zero_entries"] += 1
+            elif visits is not None and visits.get(state_key, action) < min_visits:
+                stats["rare_entries"] += 1
+            else:
+                new_row[action] = q
+        if not new_row:
+            stats["empty_rows"] += 1
+            continue
+        kept[state_key] = new_row
+
+    if fold_symmetries:
+        sums = defaultdict(lambda: defaultdict(float))
+        counts = defaultdict(Counter)
+        for state_key, row in kept.items():
+            canonical, perm = canonical_state(state_key)
+            # action i of the canonical board is action perm[i] of this one
+            inverse = {a: i for i, a in enumerate(perm)}
+            for action, q in row.items():
+                # with visit counts, better-explored variants weigh more
+                weight = max(visits.get(state_key, action), 1) if visits is not None else 1
+                sums[canonical][inverse[action]] += q * weight
+                counts[canonical][inverse[action]] += weight
+        stats["folded_states"] = len(kept) - len(sums)
+        kept = {s: {a: total / counts[s][a] for a, total in amap.items()} for s, amap in sums.items()}
+
+    stats["states_out"] = len(kept)
+    stats["entries_out"] = sum(len(row) for row in kept.values())
+    return kept, stats
+
+
+def fold_visit_counts(Q, visits: VisitCounts) -> VisitCounts:
+    """Visit counts of a symmetry-folded table: each canonical entry sums its variants."""
+    folded = VisitCounts()
+    for state_key in Q:
+        canonical, perm = canonical_state(state_key)
+        base = encode_state(canonical) * 9
+        for action, n in visits.row(state_key).items():
+            folded.counts[base + perm.index(action)] += n
+    return folded
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Prune and compact a Q-table')
+    parser.add_argument('path', nargs='?', default='qtable.pkl', help='Q-table to compact')
+    parser.add_argument('--output', type=str, default=None, help='Output path (default: <path>_compact.pkl)')
+    parser.add_argument('--fold-symmetries', action='store_true', help='Merge symmetric states into one entry')
+    parser.add_argument('--min-visits', type=int, default=0, help='Drop entries visited fewer times (needs saved visit counts)')
+    args = parser.parse_args()
+
+    original = QLearningAgent()
+    original.load(args.path)
+    if args.min_visits and original.counts is None:
+        parser.error(f"{args.path} has no visit counts (train with --count-visits)")
+    table, stats = compact_table(original.Q, args.fold_symmetries, original.counts, args.min_visits)
+
+    compacted = QLearningAgent()
+    compacted.Q.update(table)
+    compacted.folded = args.fold_symmetries
+    if original.counts is not None:
+        compacted.counts = fold_visit_counts(original.Q, original.counts) if args.fold_symmetries else original.counts
+    output = args.output or f"{os.path.splitext(args.path)[0]}_compact.pkl"
+    compacted.save(output)
+
+    size_in, size_out = os.path.getsize(args.path), os.path.getsize(output)
+    print(f"States:  {stats['states_in']} -> {stats['states_out']}")
+    print(f"Entries: {stats['entries_in']} -> {stats['entries_out']}")
+    print(f"Bytes:   {size_in} -> {size_out} ({(1 - size_out / size_in) * 100:.1f}% smaller)")
+    print("Dropped:")
+    for key in ("illegal_piece_count", "wrong_player", "terminal", "illegal_actions", "zero_entries",
+                "rare_entries", "empty_rows", "folded_states"):
+        if key in stats:
+            print(f"  {key:<20} {stats[key]}")
+    legal_states = [s for s in original.Q if position_problem(s) is None]
+    flips = original.policy_flips(compacted, legal_states)
+    print(f"Greedy policy changes: {flips} of {len(legal_states)} legal positions")
+    print(f"Wrote {output}")
@@ -0,0 +1,114 @@
+"""
+Episodes-to-target comparison of learning agents.
+
+Each agent variant is trained from scratch with several seeds in parallel worker
+processes. Every `eval_every` episodes the pair is scored with
+evaluate.score_agents(); training stops once the score reaches the target. The
+report shows how many episodes (and seconds) each variant needed and how large
+its tables are (states and stored values).
+
+    python compare_agents.py q qlambda:lam=0.8 --target 0.55 --seeds 4
+"""
+
+import contextlib
+import io
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from evaluate import score_agents
+from train import EPSILON_DECAY, MIN_EPSILON, train
+
+TARGET = 0.55
+MAX_EPISODES = 50000
+EVAL_EVERY = 1000
+
+
+def parse_variant(spec: str) -> Tuple[str, Dict]:
+    """'qlambda:lam=0.9,trace_cutoff=0.01' -> ('qlambda', {'lam': 0.9, 'trace_cutoff': 0.01})"""
+    agent_type, _, rest = spec.partition(":")
+    options = {}
+    for item in filter(None, rest.split(",")):
+        name, _, value = item.partition("=")
+        try:
+            options[name] = float(value)
+        except ValueError:
+            options[name] = value
+    return agent_type, options
+
+
+def episodes_to_target(spec: str, seed: int, target=TARGET, max_episodes=MAX_EPISODES, eval_every=EVAL_EVERY,
+                       eval_games=200, alpha=0.5, gamma=0.99, epsilon_decay=EPSILON_DECAY,
+                       min_epsilon=MIN_EPSILON) -> Dict:
+    """Train one variant until it reaches `target` (runs in a worker)."""
+    agent_type, options = parse_variant(spec)
+    random.seed(seed)
+    history = []
+    train_time = 0.0
+    resumed = time.time()
+
+    def check(episodes, agent_X, agent_O):
+        # evaluation time is not counted as training time
+        nonlocal train_time, resumed
+        train_time += time.time() - resumed
+        score = score_agents(agent_X, agent_O, eval_games)["score"]
+        history.append((episodes, score))
+        resumed = time.time()
+        return score >= target
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent_X, agent_O = train(episodes=max_episodes, save_path=None, use_csv_data=False, alpha=alpha,
+                                 gamma=gamma, epsilon_decay=epsilon_decay, min_epsilon=min_epsilon, log_every=0,
+                                 metrics_every=eval_every, agent_type=agent_type, agent_options=options,
+                                 callback=check)
+
+    episodes, score = history[-1] if history else (max_episodes, 0.0)
+    return {"spec": spec, "seed": seed, "reached": score >= target, "episodes": episodes, "score": score,
+            "train_seconds": train_time, "table_size": agent_X.table_size() + agent_O.table_size(),
+            "values": agent_X.value_count() + agent_O.value_count()}
+
+
+def compare(specs: List[str], seeds=3, workers=None, **kw) -> Dict[str, List[Dict]]:
+    results = {spec: [] for spec in specs}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(episodes_to_target, spec, seed, **kw) for spec in specs for seed in range(seeds)]
+        for future in futures:
+            result = future.result()
+            results[result["spec"]].append(result)
+    return results
+
+
+def print_comparison(results: Dict[str, List[Dict]], target=TARGET):
+    print(f"\n=== Episodes to score >= {target} ===")
+    print(f"{'agent':<24} {'reached':>8} {'median ep':>10} {'mean ep':>9} {'train s':>8} {'score':>6} {'states':>7} {'values':>7}")
+    for spec, runs in results.items():
+        reached = [r for r in runs if r["reached"]]
+        # runs that never reached the target count with their full budget
+        episodes = [r["episodes"] for r in runs]
+        print(f"{spec:<24} {len(reached):>4}/{len(runs):<3} {statistics.median(episodes):>10.0f} "
+              f"{statistics.mean(episodes):>9.0f} {statistics.mean(r['train_seconds'] for r in runs):>8.1f} "
+              f"{statistics.mean(r['score'] for r in runs):>6.3f} "
+              f"{statistics.mean(r['table_size'] for r in runs):>7.0f} "
+              f"{statistics.mean(r['values'] for r in runs):>7.0f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compare learning agents by episodes to a target score')
+    parser.add_argument('agents', nargs='+', help='Agent variants, e.g. q qlambda:lam=0.8')
+    parser.add_argument('--target', type=float, default=TARGET, help='score_agents() score to reach')
+    parser.add_argument('--max-episodes', type=int, default=MAX_EPISODES, help='Episode budget per run')
+    parser.add_argument('--eval-every', type=int, default=EVAL_EVERY, help='Episodes between evaluations')
+    parser.add_argument('--eval-games', type=int, default=200, help='Games per evaluation match')
+    parser.add_argument('--seeds', type=int, default=3, help='Runs per variant')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--alpha', type=float, default=0.5, help='Learning rate')
+    args = parser.parse_args()
+
+    results = compare(args.agents, seeds=args.seeds, workers=args.workers, target=args.target,
+                      max_episodes=args.max_episodes, eval_every=args.eval_every, eval_games=args.eval_games,
+                      alpha=args.alpha)
+    print_comparison(results, args.target)
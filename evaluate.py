@@ -1,10 +1,11 @@
 # evaluate.py
 from game import TicTacToe
-from agent import QLearningAgent
+from agent import QLearningAgent, load_agent
+from players import RandomPlayer, PerfectPlayer
 from utils import make_state_key
 import random
 
-def evaluate(agent_X: QLearningAgent, agent_O: QLearningAgent, episodes=1000):
+def evaluate(agent_X: QLearningAgent, agent_O: QLearningAgent, episodes=1000, verbose=True):
     env = TicTacToe()
     results = {"win": 0, "draw": 0, "lose": 0}
 
@@ -35,6 +36,9 @@ def evaluate(agent_X: QLearningAgent, agent_O: QLearningAgent, episodes=1000):
         else:
             results["draw"] += 1
 
+    if not verbose:
+        return results
+
     # Print summary
     total = sum(results.values())
     print(f"Evaluation over {total} AI-vs-AI games:")
@@ -45,9 +49,50 @@ def evaluate(agent_X: QLearningAgent, agent_O: QLearningAgent, episodes=1000):
     return results
 
 
+def match_points(results, as_x):
+    """Points per game (win = 1, draw = 0.5) of side X (as_x) or O from evaluate() results."""
+    wins = results["win"] if as_x else results["lose"]
+    return (wins + 0.5 * results["draw"]) / sum(results.values())
+
+
+def score_agents(agent_X, agent_O, episodes=500):
+    """
+    Single quality score for a pair of trained agents.
+    Each side plays `episodes` games against a random and a perfect opponent;
+    the score is the mean points (win = 1, draw = 0.5) over all four matches.
+    """
+    random_player, perfect_player = RandomPlayer(), PerfectPlayer()
+    scores = {
+        "x_vs_random": match_points(evaluate(agent_X, random_player, episodes, verbose=False), True),
+        "o_vs_random": match_points(evaluate(random_player, agent_O, episodes, verbose=False), False),
+        "x_vs_perfect": match_points(evaluate(agent_X, perfect_player, episodes, verbose=False), True),
+        "o_vs_perfect": match_points(evaluate(perfect_player, agent_O, episodes, verbose=False), False),
+    }
+    scores["score"] = sum(scores.values()) / 4
+    return scores
+
+
 if __name__ == "__main__":
-    agent_X = QLearningAgent()
-    agent_O = QLearningAgent()
-    agent_X.load("qtable.pkl")
-    agent_O.load("qtable.pkl")
-    evaluate(agent_X, agent_O, 10000)
+    import argparse
+    from profiling import add_profile_argument, profiled
+
+    parser = argparse.ArgumentParser(description='Evaluate trained TicTacToe agents (AI vs AI)')
+    parser.add_argument('--model-x', type=str, default='qtable.pkl', help='Q-table for player X')
+    parser.add_argument('--model-o', type=str, default='qtable.pkl', help='Q-table for player O')
+    parser.add_argument('--episodes', type=int, default=10000, help='Number of evaluation games')
+    parser.add_argument('--runs-db', type=str, default='runs.db', help='Run history database')
+    parser.add_argument('--no-record', action='store_true', help='Do not record this run in the run history')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiled(args.profile):
+        agent_X = load_agent(args.model_x)
+        agent_O = load_agent(args.model_o)
+        results = evaluate(agent_X, agent_O, args.episodes)
+
+    if not args.no_record:
+        from runlog import start_run
+        run = start_run("evaluate", {k: v for k, v in vars(args).items() if k not in ("runs_db", "no_record", "profile")}, args.runs_db)
+        total = sum(results.values())
+        run.log_results({f"{name}_rate": count / total for name, count in results.items()})
+        run.finish()
@@ -1,5 +1,12 @@
 from typing import List, Tuple, Optional
 
+# alle Gewinnlinien (Reihen, Spalten, Diagonalen)
+LINES = [
+    (0,1,2),(3,4,5),(6,7,8),
+    (0,3,6),(1,4,7),(2,5,8),
+    (0,4,8),(2,4,6)
+]
+
 class TicTacToe:
     def __init__(self):
         self.reset()
@@ -9,6 +16,7 @@ class TicTacToe:
         self.current_player = 1
         self.done = False
         self.winner = None
+        self.history = []      # gespielte Züge in Reihenfolge
         return tuple(self.board)
 
     def legal_actions(self) -> List[int]:
@@ -23,6 +31,7 @@ class TicTacToe:
             return tuple(self.board), -1, True, {"illegal": True}
 
         self.board[action] = self.current_player
+        self.history.append(action)
         self._check_done()
 
         if self.done:
@@ -39,12 +48,7 @@ class TicTacToe:
 
     def _check_done(self):
         b = self.board
-        lines = [
-            (0,1,2),(3,4,5),(6,7,8),
-            (0,3,6),(1,4,7),(2,5,8),
-            (0,4,8),(2,4,6)
-        ]
-        for a,b1,c in lines:
+        for a,b1,c in LINES:
             s = b[a] + b[b1] + b[c]
             if s == 3:
                 self.done, self.winner = True, 1
@@ -0,0 +1,146 @@
+"""
+Compact append-only game records.
+
+File layout: a 4-byte magic and a version byte, then one variable-length record
+per game:
+    byte 0    move count (bits 0-3) | result (bits 4-5: 0 draw, 1 X wins, 2 O wins, 3 unfinished)
+    byte 1    source tag (train, play, gui, ...)
+    bytes 2-  moves as 4-bit nibbles, two per byte, first move in the low nibble
+A full game takes at most 7 bytes. Games always start with X.
+
+    python gamerecord.py stats games.ttt
+    python gamerecord.py dump games.ttt --limit 10
+"""
+
+import mmap
+import os
+from collections import Counter, namedtuple
+from typing import Iterator, Optional, Sequence
+
+MAGIC = b"TTTG"
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+
+SOURCES = ("train", "play", "gui", "selfplay", "human")
+_RESULT_CODES = {0: 0, 1: 1, -1: 2, None: 3}
+_RESULTS = {code: winner for winner, code in _RESULT_CODES.items()}
+
+GameRecord = namedtuple("GameRecord", ["moves", "winner", "source"])
+
+
+def pack_game(moves: Sequence[int], winner: Optional[int], source=0) -> bytes:
+    n = len(moves)
+    if n > 9:
+        raise ValueError("a game has at most 9 moves")
+    data = bytearray((n | _RESULT_CODES[winner] << 4, source))
+    for i in range(0, n, 2):
+        high = moves[i + 1] if i + 1 < n else 0
+        data.append(moves[i] | high << 4)
+    return bytes(data)
+
+
+class GameRecordWriter:
+    """Buffered appender; write() costs one small bytes object per game."""
+
+    def __init__(self, path, source="train", buffer_size=1 << 16):
+        self.source = SOURCES.index(source)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new_file:
+            with open(path, "rb") as f:
+                if f.read(len(HEADER)) != HEADER:
+                    raise ValueError(f"{path} is not a game record file (version {VERSION})")
+        self.f = open(path, "ab", buffering=buffer_size)
+        if new_file:
+            self.f.write(HEADER)
+
+    def write(self, moves: Sequence[int], winner: Optional[int], source: Optional[str] = None):
+        tag = self.source if source is None else SOURCES.index(source)
+        self.f.write(pack_game(moves, winner, tag))
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_packed(data, pos=0) -> Iterator[GameRecord]:
+    """
+    Iterate packed game records in a bytes-like object, starting at offset `pos`.
+    Raises ValueError at a record that is cut off (e.g. by an interrupted write).
+    """
+    end = len(data)
+    while pos < end:
+        if pos + 2 > end:
+            raise ValueError(f"truncated game record at offset {pos}")
+        head, source = data[pos], data[pos + 1]
+        n = head & 0x0F
+        size = (n + 1) // 2
+        if pos + 2 + size > end:
+            raise ValueError(f"truncated game record at offset {pos}")
+        moves = []
+        for byte in data[pos + 2:pos + 2 + size]:
+            moves.append(byte & 0x0F)
+            moves.append(byte >> 4)
+        yield GameRecord(tuple(moves[:n]), _RESULTS[head >> 4 & 0x03], SOURCES[source])
+        pos += 2 + size
+
+
+def iter_games(path) -> Iterator[GameRecord]:
+    """Iterate all games of a record file via a read-only memory map."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= len(HEADER):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a game record file")
+            yield from iter_packed(mm, len(HEADER))
+
+
+def game_stats(path):
+    games = 0
+    results = Counter()
+    sources = Counter()
+    lengths = Counter()
+    openings = Counter()
+    for game in iter_games(path):
+        games += 1
+        results[{1: "X wins", -1: "O wins", 0: "draw", None: "unfinished"}[game.winner]] += 1
+        sources[game.source] += 1
+        lengths[len(game.moves)] += 1
+        if game.moves:
+            openings[game.moves[0]] += 1
+
+    size = os.path.getsize(path)
+    print(f"Games: {games}   file size: {size} bytes ({size / max(games, 1):.2f} bytes/game)")
+    print(f"Results: {dict(results)}")
+    print(f"Sources: {dict(sources)}")
+    print(f"Game lengths: {dict(sorted(lengths.items()))}")
+    print(f"Opening moves: {dict(sorted(openings.items()))}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect game record files')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('stats', help='Summary statistics')
+    p.add_argument('path')
+    p = sub.add_parser('dump', help='Print games')
+    p.add_argument('path')
+    p.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        game_stats(args.path)
+    else:
+        for i, game in enumerate(iter_games(args.path)):
+            if i >= args.limit:
+                break
+            print(f"{game.source:<8} winner={game.winner!s:<5} moves={' '.join(map(str, game.moves))}")
@@ -6,32 +6,91 @@ Allows playing against the trained RL agent with a graphical interface.
 import tkinter as tk
 from tkinter import messagebox, ttk
 from game import TicTacToe
-from agent import QLearningAgent
+from agent import QLearningAgent, load_agent
+from book import Book
+from gamerecord import GameRecordWriter
+from online import MAX_LOG_GAMES, OnlineLearner
+from solver import action_values, board_winner
 from utils import make_state_key
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import os
+import threading
+import time
+
+# Interval for polling background work from the Tk main loop
+POLL_MS = 20
+# Maximum number of analysed positions kept in memory
+ANALYSIS_CACHE_SIZE = 4096
+SOLVED_LABELS = {1: "win", 0: "draw", -1: "loss"}
+
+
+class AnalysisCache:
+    """Thread-safe bounded LRU cache of position analyses."""
+    
+    def __init__(self, maxsize=ANALYSIS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+    
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def blend(color_a, color_b, t):
+    """Mix two '#rrggbb' colors, t=0 gives color_a and t=1 gives color_b."""
+    a = [int(color_a[i:i + 2], 16) for i in (1, 3, 5)]
+    b = [int(color_b[i:i + 2], 16) for i in (1, 3, 5)]
+    return "#" + "".join(f"{round(x + (y - x) * t):02x}" for x, y in zip(a, b))
 
 
 class TicTacToeGUI:
-    def __init__(self, root, qtable_path="qtable.pkl"):
+    def __init__(self, root, qtable_path="qtable.pkl", record_path=None, book_path=None, learn=False,
+                 max_log_games=MAX_LOG_GAMES):
         self.root = root
         self.root.title("TicTacToe - RL Agent")
         self.root.resizable(False, False)
         
-        # Initialize game and agent
+        # Initialize game and agent. The model is loaded in the background so the
+        # window appears immediately; agent decisions run on the same worker thread.
         self.env = TicTacToe()
         self.agent = QLearningAgent()
-        
-        # Load trained model if available
-        if os.path.exists(qtable_path):
-            try:
-                self.agent.load(qtable_path)
-                self.model_loaded = True
-            except Exception as e:
-                print(f"Error loading model: {e}")
-                self.model_loaded = False
-        else:
-            self.model_loaded = False
-            print(f"Warning: Model file {qtable_path} not found. Agent will play randomly.")
+        self.recorder = GameRecordWriter(record_path, "gui") if record_path else None
+        # Online learning from finished games; the learner is created with the model
+        self.learn = learn
+        self.max_log_games = max_log_games
+        self.learner = None
+        self.model_loaded = False
+        self.loading = True
+        self.load_time = None
+        self.think_time = None
+        self.agent_thinking = False
+        self.game_id = 0
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.load_future = self.executor.submit(self.load_model, qtable_path, book_path)
+        
+        # Analysis overlay: Q-values and solved values per empty cell, computed on a
+        # separate worker so it never delays agent moves
+        self.analysis_mode = False
+        self.analysis_cache = AnalysisCache()
+        self.analysis_pending = set()
+        self.analysis_warmed = None
+        self.analysis_executor = ThreadPoolExecutor(max_workers=1)
         
         # Configuration state
         self.dark_mode = False
@@ -51,7 +110,9 @@ class TicTacToeGUI:
                 'text': '#000000',
                 'button_active': '#e0e0e0',
                 'status_bg': '#ffffff',
-                'frame_bg': '#f0f0f0'
+                'frame_bg': '#f0f0f0',
+                'good': '#66bb6a',
+                'bad': '#ef5350'
             },
             'dark': {
                 'bg': '#2b2b2b',
@@ -59,7 +120,9 @@ class TicTacToeGUI:
                 'text': '#ffffff',
                 'button_active': '#4a4a4a',
                 'status_bg': '#3c3c3c',
-                'frame_bg': '#2b2b2b'
+                'frame_bg': '#2b2b2b',
+                'good': '#2e7d32',
+                'bad': '#c62828'
             }
         }
         
@@ -72,6 +135,7 @@ class TicTacToeGUI:
         
         # Apply initial theme
         self.apply_theme()
+        self.root.after(POLL_MS, self.check_model_loaded)
         
         # Start game based on configuration
         if self.agent_starts:
@@ -162,6 +226,15 @@ class TicTacToeGUI:
         )
         self.new_game_btn.pack(side=tk.LEFT, padx=5)
         
+        self.analysis_btn = tk.Button(
+            self.control_frame,
+            text="Analysis: Off",
+            font=("Arial", 12),
+            command=self.toggle_analysis,
+            padx=20
+        )
+        self.analysis_btn.pack(side=tk.LEFT, padx=5)
+        
         self.quit_btn = tk.Button(
             self.control_frame,
             text="Quit",
@@ -172,18 +245,120 @@ class TicTacToeGUI:
         self.quit_btn.pack(side=tk.LEFT, padx=5)
         
         # Info label
-        info_text = "Loaded trained model" if self.model_loaded else "No trained model (random play)"
         self.info_label = tk.Label(
             self.root,
-            text=info_text,
+            text="Loading model...",
             font=("Arial", 10),
             fg="gray"
         )
         self.info_label.pack(pady=5)
         
+        # Latency readout
+        self.latency_label = tk.Label(
+            self.root,
+            text=self.latency_text(),
+            font=("Arial", 9),
+            fg="gray"
+        )
+        self.latency_label.pack(pady=(0, 5))
+        
         # Store config frame for theme application
         self.config_frame = config_frame
     
+    def load_model(self, qtable_path, book_path=None):
+        """Load the Q-table and book (runs on the worker thread). Returns (agent, loaded, seconds)."""
+        start = time.perf_counter()
+        agent = QLearningAgent()
+        loaded = False
+        if os.path.exists(qtable_path):
+            try:
+                agent = load_agent(qtable_path)
+                loaded = True
+            except Exception as e:
+                print(f"Error loading model: {e}")
+        else:
+            print(f"Warning: Model file {qtable_path} not found. Agent will play randomly.")
+        if book_path:
+            try:
+                agent.book = Book.load(book_path)
+            except Exception as e:
+                print(f"Error loading book: {e}")
+        # never learn into (and later overwrite) a model file that failed to load
+        if self.learn and (loaded or not os.path.exists(qtable_path)):
+            try:
+                self.learner = OnlineLearner(agent, qtable_path, max_log_games=self.max_log_games)
+            except Exception as e:
+                print(f"Online learning disabled: {e}")
+        return agent, loaded, time.perf_counter() - start
+    
+    def check_model_loaded(self):
+        """Swap in the background-loaded agent once it is ready."""
+        if not self.load_future.done():
+            self.root.after(POLL_MS, self.check_model_loaded)
+            return
+        self.agent, self.model_loaded, self.load_time = self.load_future.result()
+        self.loading = False
+        self.analysis_cache.clear()
+        self.analysis_warmed = None
+        info = "Loaded trained model" if self.model_loaded else "No trained model (random play)"
+        if self.learner:
+            info += " - learning from your games"
+        self.info_label.config(text=info)
+        self.latency_label.config(text=self.latency_text())
+        self.update_board_display()
+    
+    def latency_text(self):
+        load = "loading..." if self.load_time is None else f"{self.load_time * 1000:.0f} ms"
+        think = "-" if self.think_time is None else f"{self.think_time * 1000:.2f} ms"
+        return f"Model load: {load} | Agent think time: {think}"
+    
+    def timed_get_action(self, state_key, legal):
+        """Agent decision (runs on the worker thread). Returns (action, seconds)."""
+        start = time.perf_counter()
+        action = self.agent.get_action(state_key, legal, training=False)
+        return action, time.perf_counter() - start
+    
+    def analyse_position(self, board, player):
+        """Agent Q-value and solved game value of every legal move (worker thread)."""
+        q = self.agent.q_values(make_state_key(board, player))
+        return {a: (q.get(a, 0.0), v) for a, v in action_values(board, player).items()}
+    
+    def precompute_analysis(self, board, player):
+        """Analyse a position and every position reachable in one move (worker thread)."""
+        positions = [(board, player)]
+        positions += [(board[:a] + (player,) + board[a + 1:], -player) for a in range(9) if board[a] == 0]
+        for key in positions:
+            if board_winner(key[0]) is None and self.analysis_cache.get(key) is None:
+                self.analysis_cache.put(key, self.analyse_position(*key))
+    
+    def current_analysis(self):
+        """Cached analysis of the current position, scheduling it in the background on a miss."""
+        key = (tuple(self.env.board), self.env.current_player)
+        result = self.analysis_cache.get(key)
+        if result is None and key not in self.analysis_pending and not self.loading:
+            self.analysis_pending.add(key)
+            future = self.analysis_executor.submit(self.precompute_analysis, *key)
+            self.root.after(POLL_MS, lambda: self.finish_analysis(future, key))
+        elif result is not None and key != self.analysis_warmed:
+            # warm the cache for the positions after the next move
+            self.analysis_warmed = key
+            self.analysis_executor.submit(self.precompute_analysis, *key)
+        return result
+    
+    def finish_analysis(self, future, key):
+        if not future.done():
+            self.root.after(POLL_MS, lambda: self.finish_analysis(future, key))
+            return
+        self.analysis_pending.discard(key)
+        if self.analysis_mode and key == (tuple(self.env.board), self.env.current_player):
+            self.update_board_display()
+    
+    def toggle_analysis(self):
+        """Show or hide the analysis overlay."""
+        self.analysis_mode = not self.analysis_mode
+        self.analysis_btn.config(text="Analysis: On" if self.analysis_mode else "Analysis: Off")
+        self.update_board_display()
+    
     def get_symbol_map(self):
         """Get symbol mapping based on configuration."""
         return {self.agent_id: self.agent_symbol, self.player_id: self.player_symbol, 0: " "}
@@ -192,6 +367,7 @@ class TicTacToeGUI:
         """Update button texts to reflect current board state."""
         symbols = self.get_symbol_map()
         theme = self.colors['dark' if self.dark_mode else 'light']
+        analysis = self.current_analysis() if self.analysis_mode and self.game_active else None
         
         for i in range(3):
             for j in range(3):
@@ -199,11 +375,22 @@ class TicTacToeGUI:
                 symbol = symbols[self.env.board[idx]]
                 self.buttons[i][j].config(
                     text=symbol,
+                    font=("Arial", 32, "bold"),
                     bg=theme['button'],
                     fg=theme['text'],
                     activebackground=theme['button_active']
                 )
                 
+                # Analysis overlay on empty cells: Q-value, solved value and heatmap color
+                if analysis and idx in analysis:
+                    q, solved = analysis[idx]
+                    target = theme['good'] if q > 0 else theme['bad']
+                    self.buttons[i][j].config(
+                        text=f"{q:+.2f}\n{SOLVED_LABELS[solved]}",
+                        font=("Arial", 11),
+                        bg=blend(theme['button'], target, min(abs(q), 1.0))
+                    )
+                
                 # Disable button if cell is occupied
                 if self.env.board[idx] != 0 or not self.game_active:
                     self.buttons[i][j].config(state="disabled")
@@ -236,6 +423,7 @@ class TicTacToeGUI:
         # Apply to labels
         self.status_label.config(bg=theme['status_bg'], fg=theme['text'])
         self.info_label.config(bg=theme['bg'], fg='gray')
+        self.latency_label.config(bg=theme['bg'], fg='gray')
         
         # Apply to configuration labels
         for widget in self.config_frame.winfo_children():
@@ -245,6 +433,7 @@ class TicTacToeGUI:
         # Apply to buttons
         self.dark_mode_btn.config(bg=theme['button'], fg=theme['text'], activebackground=theme['button_active'])
         self.new_game_btn.config(bg=theme['button'], fg=theme['text'], activebackground=theme['button_active'])
+        self.analysis_btn.config(bg=theme['button'], fg=theme['text'], activebackground=theme['button_active'])
         self.quit_btn.config(bg=theme['button'], fg=theme['text'], activebackground=theme['button_active'])
         
         # Apply to game board buttons
@@ -271,8 +460,13 @@ class TicTacToeGUI:
         self.root.after(500, self.agent_move)
     
     def agent_move(self):
-        """Agent makes its move."""
-        if not self.game_active or self.env.current_player != self.agent_id:
+        """Ask the agent for a move on the worker thread."""
+        if not self.game_active or self.env.current_player != self.agent_id or self.agent_thinking:
+            return
+        
+        if self.loading:
+            # Model still loading - try again shortly
+            self.root.after(100, self.agent_move)
             return
         
         state_key = make_state_key(tuple(self.board), self.env.current_player)
@@ -282,8 +476,23 @@ class TicTacToeGUI:
             self.end_game()
             return
         
-        # Agent selects action
-        action = self.agent.get_action(state_key, legal, training=False)
+        # Agent selects action in the background
+        self.agent_thinking = True
+        game_id = self.game_id
+        future = self.executor.submit(self.timed_get_action, state_key, legal)
+        self.root.after(POLL_MS, lambda: self.finish_agent_move(future, game_id))
+    
+    def finish_agent_move(self, future, game_id):
+        """Apply the agent's move once the worker has decided."""
+        if not future.done():
+            self.root.after(POLL_MS, lambda: self.finish_agent_move(future, game_id))
+            return
+        if game_id != self.game_id:
+            # A new game was started while the agent was thinking
+            return
+        self.agent_thinking = False
+        action, self.think_time = future.result()
+        self.latency_label.config(text=self.latency_text())
         
         # Agent makes move
         self.board, _, done, _ = self.env.step(action)
@@ -301,6 +510,12 @@ class TicTacToeGUI:
         self.game_active = False
         self.update_board_display()
         
+        if self.recorder:
+            self.recorder.write(self.env.history, self.env.winner)
+            self.recorder.flush()
+        if self.learner:
+            self.learner.submit(self.env.history, self.env.winner)
+        
         if self.env.winner == self.agent_id:
             message = "Agent wins!"
             self.update_status(f"Game Over - Agent ({self.agent_symbol}) wins!")
@@ -312,7 +527,11 @@ class TicTacToeGUI:
             self.update_status("Game Over - Draw!")
         
         # Show result in message box
-        self.root.after(500, lambda: messagebox.showinfo("Game Over", message))
+        self.root.after(500, lambda: self.show_game_over(message))
+    
+    def show_game_over(self, message):
+        """Show the game result in a message box."""
+        messagebox.showinfo("Game Over", message)
     
     def new_game(self):
         """Start a new game with current configuration."""
@@ -346,9 +565,15 @@ class TicTacToeGUI:
             self.player_id = 1   # Player goes first
             self.agent_id = -1   # Agent goes second
         
-        # Reset game
+        # Reset game (pending agent moves of the old game are discarded)
+        self.game_id += 1
+        self.agent_thinking = False
         self.board = self.env.reset()
         self.game_active = True
+        if self.learner:
+            # cached Q-values may predate what was learned from the last game
+            self.analysis_cache.clear()
+            self.analysis_warmed = None
         self.update_board_display()
         
         # Start game based on configuration
@@ -365,11 +590,23 @@ def main():
     
     parser = argparse.ArgumentParser(description='TicTacToe GUI with RL agent')
     parser.add_argument('--model', type=str, default='qtable.pkl', help='Path to trained model file')
+    parser.add_argument('--record-games', type=str, default=None, help='Append finished games to this game record file')
+    parser.add_argument('--book', type=str, default=None, help='Opening book / endgame tablebase to consult first')
+    parser.add_argument('--learn', action='store_true', help='Learn from finished games (online learning)')
+    parser.add_argument('--learn-log-max', type=int, default=MAX_LOG_GAMES,
+                        help='Fold the update log into the model after this many games')
     args = parser.parse_args()
     
     root = tk.Tk()
-    app = TicTacToeGUI(root, qtable_path=args.model)
+    app = TicTacToeGUI(root, qtable_path=args.model, record_path=args.record_games, book_path=args.book,
+                       learn=args.learn, max_log_games=args.learn_log_max)
     root.mainloop()
+    app.executor.shutdown(wait=False)
+    app.analysis_executor.shutdown(wait=False)
+    if app.recorder:
+        app.recorder.close()
+    if app.learner:
+        app.learner.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,207 @@
+"""
+Headless latency stress test for the GUI code path.
+
+Drives the real TicTacToeGUI controller logic (player_move -> agent_move on the
+worker thread -> finish_agent_move -> update_board_display) with stand-in widgets
+and a virtual-time event loop, so it runs without a display. Fixed cosmetic delays
+(the 500 ms before the agent moves) are skipped; only real compute time is measured.
+
+    python gui_stress.py --games 2000 --human random
+"""
+
+import heapq
+import itertools
+import random
+import resource
+import time
+import tracemalloc
+
+from gui import TicTacToeGUI
+from solver import best_actions
+
+
+class HeadlessWidget:
+    """Stand-in for a Tk widget: remembers its configuration."""
+
+    def __init__(self, **kw):
+        self.options = dict(kw)
+
+    def config(self, **kw):
+        self.options.update(kw)
+
+    configure = config
+
+    def cget(self, key):
+        return self.options.get(key)
+
+    def winfo_children(self):
+        return []
+
+
+class HeadlessVar:
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class HeadlessRoot(HeadlessWidget):
+    """Tk root replacement with a virtual-time after() queue."""
+
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+        self._queue = []
+        self._order = itertools.count()
+
+    def title(self, *args):
+        pass
+
+    def resizable(self, *args):
+        pass
+
+    def update(self):
+        pass
+
+    def quit(self):
+        pass
+
+    def after(self, ms, func=None, *args):
+        heapq.heappush(self._queue, (self.now + ms / 1000, next(self._order), func, args))
+
+    def run_until(self, condition, timeout=10.0):
+        """Run scheduled callbacks in virtual-time order until condition() holds."""
+        deadline = time.perf_counter() + timeout
+        while not condition():
+            if not self._queue:
+                raise RuntimeError("event queue drained before condition was met")
+            if time.perf_counter() > deadline:
+                raise TimeoutError("GUI did not reach the expected state")
+            when, _, func, args = heapq.heappop(self._queue)
+            if when > self.now:
+                # Tk would idle here; release the GIL so worker threads can run
+                time.sleep(0)
+            self.now = when
+            func(*args)
+
+
+class HeadlessGUI(TicTacToeGUI):
+    """TicTacToeGUI with stand-in widgets instead of Tk ones."""
+
+    def setup_ui(self):
+        self.config_frame = HeadlessWidget()
+        self.board_frame = HeadlessWidget()
+        self.control_frame = HeadlessWidget()
+        self.status_label = HeadlessWidget()
+        self.info_label = HeadlessWidget()
+        self.latency_label = HeadlessWidget()
+        self.dark_mode_btn = HeadlessWidget()
+        self.new_game_btn = HeadlessWidget()
+        self.analysis_btn = HeadlessWidget()
+        self.quit_btn = HeadlessWidget()
+        self.first_player_var = HeadlessVar("agent")
+        self.player_symbol_var = HeadlessVar("O")
+        self.agent_symbol_var = HeadlessVar("X")
+        self.buttons = [[HeadlessWidget(text=" ") for _ in range(3)] for _ in range(3)]
+
+    def show_game_over(self, message):
+        self.last_message = message
+
+
+def human_move(app, style):
+    legal = app.env.legal_actions()
+    if style == "first":
+        return legal[0]
+    if style == "solver":
+        return random.choice(best_actions(tuple(app.env.board), app.env.current_player))
+    return random.choice(legal)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def run_stress(qtable_path="qtable.pkl", games=1000, human="random", analysis=False, seed=0):
+    """Play `games` games through the GUI controller and return latency/memory stats."""
+    random.seed(seed)
+
+    # Memory is traced only while the model loads; tracing would distort the latencies
+    tracemalloc.start()
+    root = HeadlessRoot()
+    app = HeadlessGUI(root, qtable_path=qtable_path)
+    root.run_until(lambda: not app.loading)
+    model_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    if analysis:
+        app.toggle_analysis()
+
+    response, think = [], []
+    results = {"agent": 0, "player": 0, "draw": 0}
+    agent_turn_over = lambda: not app.game_active or app.env.current_player == app.player_id
+
+    def wait_for_agent():
+        filled = 9 - app.env.board.count(0)
+        start = time.perf_counter()
+        root.run_until(agent_turn_over)
+        if 9 - app.env.board.count(0) > filled:
+            response.append(time.perf_counter() - start)
+            think.append(app.think_time)
+
+    for game in range(games):
+        app.first_player_var.set("agent" if game % 2 == 0 else "player")
+        app.new_game()
+        wait_for_agent()
+        while app.game_active:
+            app.player_move(human_move(app, human))
+            wait_for_agent()
+
+        if app.env.winner == app.agent_id:
+            results["agent"] += 1
+        elif app.env.winner == app.player_id:
+            results["player"] += 1
+        else:
+            results["draw"] += 1
+
+    app.executor.shutdown()
+    app.analysis_executor.shutdown()
+
+    response.sort()
+    think.sort()
+    return {
+        "games": games,
+        "agent_moves": len(response),
+        "model_load_ms": app.load_time * 1000,
+        "response_ms": {p: percentile(response, p) * 1000 for p in (50, 95, 99)},
+        "think_ms": {p: percentile(think, p) * 1000 for p in (50, 95, 99)},
+        "model_memory_kb": model_bytes / 1024,
+        # ru_maxrss is in KiB on Linux
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Headless GUI latency stress test')
+    parser.add_argument('--model', type=str, default='qtable.pkl', help='Path to trained model file')
+    parser.add_argument('--games', type=int, default=1000, help='Number of games to simulate')
+    parser.add_argument('--human', choices=['random', 'first', 'solver'], default='random', help='Simulated human moves')
+    parser.add_argument('--analysis', action='store_true', help='Run with the analysis overlay enabled')
+    args = parser.parse_args()
+
+    stats = run_stress(args.model, args.games, args.human, args.analysis)
+    print(f"Games: {stats['games']}   agent moves: {stats['agent_moves']}   results: {stats['results']}")
+    print(f"Model load time:          {stats['model_load_ms']:.1f} ms")
+    for name, key in (("Agent response latency", "response_ms"), ("Agent think time", "think_ms")):
+        pct = stats[key]
+        print(f"{name + ':':<25} p50={pct[50]:.3f} ms  p95={pct[95]:.3f} ms  p99={pct[99]:.3f} ms")
+    print(f"Model memory (traced):    {stats['model_memory_kb']:.0f} KiB")
+    print(f"Max RSS:                  {stats['max_rss_kb'] / 1024:.1f} MiB")
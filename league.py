@@ -0,0 +1,156 @@
+"""
+League training against an opponent pool.
+
+Instead of only pitting the live X agent against the live O agent, the league
+periodically freezes both agents into an opponent pool and samples each episode's
+opponent from {live self-play, pool snapshot, random player, perfect player} by
+configurable weights. Snapshots are stored as FrozenPolicy objects: one byte per
+possible state holding the greedy action, so keeping and sampling them is cheap.
+"""
+
+import random
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+from agent import NUM_STATES, QLearningAgent
+from game import TicTacToe
+from players import PerfectPlayer, RandomPlayer
+from train import EPISODES, EPSILON_DECAY, MIN_EPSILON, pretrain_with_csv_data, run_game, side_paths
+from utils import encode_state
+
+DEFAULT_WEIGHTS = {"self": 0.3, "pool": 0.5, "random": 0.1, "solver": 0.1}
+SNAPSHOT_EVERY = 2500
+POOL_SIZE = 20
+
+
+class FrozenPolicy:
+    """Read-only greedy policy: action + 1 per encoded state, 0 = unknown state."""
+
+    __slots__ = ("actions",)
+
+    def __init__(self, actions: bytearray):
+        self.actions = actions
+
+    @classmethod
+    def from_agent(cls, agent: QLearningAgent) -> "FrozenPolicy":
+        actions = bytearray(NUM_STATES)
+        for state_key, row in agent.Q.items():
+            legal = [a for a, v in enumerate(state_key[0]) if v == 0]
+            values = [(row.get(a, 0.0), a) for a in legal]
+            if values and any(q != 0.0 for q, _ in values):
+                actions[encode_state(state_key)] = max(values)[1] + 1
+        return cls(bytes(actions))
+
+    def get_action(self, state_key: Tuple, legal: List[int], training=False) -> int:
+        action = self.actions[encode_state(state_key)] - 1
+        return action if action in legal else random.choice(legal)
+
+
+def play_episode(env: TicTacToe, players: Dict[int, object], learners) -> int:
+    """
+    Play one game between players[1] (X) and players[-1] (O); every player id in
+    `learners` explores and learns (see train.run_game). Returns the winner.
+    """
+    return run_game(env, players, learners)
+
+
+def parse_weights(text: str) -> Dict[str, float]:
+    """Parse 'self=0.3,pool=0.5,random=0.1,solver=0.1'."""
+    weights = {}
+    for part in text.split(","):
+        name, value = part.split("=")
+        name = name.strip()
+        if name not in DEFAULT_WEIGHTS:
+            raise ValueError(f"Unknown opponent type '{name}' (expected one of {list(DEFAULT_WEIGHTS)})")
+        weights[name] = float(value)
+    return weights
+
+
+def train_league(episodes=EPISODES, save_path="qtable.pkl", weights=None, snapshot_every=SNAPSHOT_EVERY,
+                 pool_size=POOL_SIZE, use_csv_data=False, csv_data_file="tic-tac-toe.data", alpha=0.5, gamma=0.99,
+                 epsilon_decay=EPSILON_DECAY, min_epsilon=MIN_EPSILON, log_every=5000):
+    weights = dict(weights or DEFAULT_WEIGHTS)
+    env = TicTacToe()
+
+    live = {1: QLearningAgent(alpha=alpha, gamma=gamma, epsilon=1.0),
+            -1: QLearningAgent(alpha=alpha, gamma=gamma, epsilon=1.0)}
+    if use_csv_data:
+        pretrain_with_csv_data(live[1], csv_data_file)
+        pretrain_with_csv_data(live[-1], csv_data_file)
+
+    # pool[side] holds frozen snapshots of the agent that plays `side`
+    pool = {1: deque(maxlen=pool_size), -1: deque(maxlen=pool_size)}
+    builtin = {"random": RandomPlayer(), "solver": PerfectPlayer()}
+    kinds = list(weights)
+    kind_weights = [weights[k] for k in kinds]
+    counts = {k: 0 for k in kinds}
+    learner_wins = 0
+    start = time.time()
+
+    print(f"=== Starting league training ({', '.join(f'{k}={w}' for k, w in weights.items())}) ===")
+
+    for ep in range(episodes):
+        kind = random.choices(kinds, kind_weights)[0]
+        learner = 1 if ep % 2 == 0 else -1
+
+        if kind == "pool" and not pool[-learner]:
+            kind = "self"
+        counts[kind] += 1
+
+        if kind == "self":
+            winner = play_episode(env, live, (1, -1))
+        else:
+            opponent = random.choice(pool[-learner]) if kind == "pool" else builtin[kind]
+            players = {learner: live[learner], -learner: opponent}
+            winner = play_episode(env, players, (learner,))
+            learner_wins += winner == learner
+
+        for agent in live.values():
+            agent.epsilon = max(min_epsilon, agent.epsilon * epsilon_decay)
+
+        if (ep + 1) % snapshot_every == 0:
+            pool[1].append(FrozenPolicy.from_agent(live[1]))
+            pool[-1].append(FrozenPolicy.from_agent(live[-1]))
+
+        if log_every and ep % log_every == 0:
+            rate = (ep + 1) / max(time.time() - start, 1e-9)
+            print(f"Episode {ep}/{episodes} | eps={live[1].epsilon:.3f} | pool={len(pool[1])} | "
+                  f"{rate:.0f} ep/s | opponents {counts}")
+
+    non_self = sum(n for k, n in counts.items() if k != "self")
+    if non_self:
+        print(f"Learner win rate against sampled opponents: {learner_wins / non_self * 100:.1f}%")
+
+    if save_path:
+        path_X, path_O = side_paths(save_path)
+        live[1].save(path_X)
+        live[-1].save(path_O)
+
+    print("League training completed.")
+    return live[1], live[-1]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='League training against a pool of frozen snapshots')
+    parser.add_argument('--episodes', type=int, default=EPISODES, help='Number of training episodes')
+    parser.add_argument('--weights', type=parse_weights, default=DEFAULT_WEIGHTS,
+                        help='Opponent sampling weights, e.g. self=0.3,pool=0.5,random=0.1,solver=0.1')
+    parser.add_argument('--snapshot-every', type=int, default=SNAPSHOT_EVERY, help='Episodes between pool snapshots')
+    parser.add_argument('--pool-size', type=int, default=POOL_SIZE, help='Maximum snapshots kept per side')
+    parser.add_argument('--csv', action='store_true', help='Pre-train with CSV data first')
+    parser.add_argument('--csv-file', type=str, default='tic-tac-toe.data', help='Path to CSV data file')
+    parser.add_argument('--output', type=str, default='qtable.pkl', help='Base output path (X/O tables get _X/_O suffixes)')
+    parser.add_argument('--alpha', type=float, default=0.5, help='Learning rate')
+    parser.add_argument('--gamma', type=float, default=0.99, help='Discount factor')
+    parser.add_argument('--epsilon-decay', type=float, default=EPSILON_DECAY, help='Per-episode epsilon decay')
+    parser.add_argument('--min-epsilon', type=float, default=MIN_EPSILON, help='Epsilon floor')
+
+    args = parser.parse_args()
+
+    train_league(episodes=args.episodes, save_path=args.output, weights=args.weights,
+                 snapshot_every=args.snapshot_every, pool_size=args.pool_size, use_csv_data=args.csv,
+                 csv_data_file=args.csv_file, alpha=args.alpha, gamma=args.gamma,
+                 epsilon_decay=args.epsilon_decay, min_epsilon=args.min_epsilon)
@@ -0,0 +1,136 @@
+"""
+Online learning from games played against humans (gui.py / play.py --learn).
+
+Every finished game is handed to OnlineLearner.submit(), which only queues it.
+A background thread then does three things with each game:
+- it applies the game's Q-updates to a private copy of the table (train.replay_game);
+- it swaps that copy in as the live table with a single attribute assignment;
+- it appends the game to an update log next to the model.
+The copy is shallow: only the rows the game's updates write are duplicated, so
+the agent keeps reading a complete, unchanging table while the game is learned.
+
+The update log is a game-record file (source "human"). Appending one game costs
+a few bytes, and the model pickle is not rewritten after every game. On start,
+games in the log are replayed onto the loaded model. Once the log holds
+`max_log_games` games, it is compacted: the current table is saved as the model
+(temp file + rename) and the log starts over. A crash between those two steps
+replays the logged games once more on the next start. That only repeats their
+updates.
+"""
+
+import copy
+import os
+import queue
+import threading
+
+from agent import QLambdaAgent, QLearningAgent
+from game import TicTacToe
+from gamerecord import GameRecordWriter, iter_games
+from train import replay_game
+from utils import canonical_state, make_state_key
+
+ONLINE_ALPHA = 0.1  # human games are few and noisy; smaller steps than self-play
+MAX_LOG_GAMES = 500
+
+
+def update_log_path(model_path):
+    return os.path.splitext(model_path)[0] + ".updates.ttt"
+
+
+def game_states(moves):
+    """State keys of the positions in which the moves of a game were played."""
+    env = TicTacToe()
+    board = env.reset()
+    states = []
+    for action in moves:
+        states.append(make_state_key(board, env.current_player))
+        board, _, done, _ = env.step(action)
+        if done:
+            break
+    return states
+
+
+class OnlineLearner:
+    def __init__(self, agent, model_path, log_path=None, alpha=ONLINE_ALPHA, max_log_games=MAX_LOG_GAMES):
+        if not isinstance(agent, QLearningAgent):
+            raise ValueError("online learning needs a table agent (q, qlambda or afterstate)")
+        self.agent = agent
+        self.model_path = model_path
+        self.log_path = log_path or update_log_path(model_path)
+        self.max_log_games = max_log_games
+        self.table_attr = "V" if hasattr(agent, "V") else "Q"
+        self.env = TicTacToe()
+
+        # the learner updates its own shallow copy of the agent; visit counts only
+        # matter for learning and are shared and updated in place
+        self.shadow = copy.copy(agent)
+        self.shadow.alpha = alpha
+        if isinstance(agent, QLambdaAgent):
+            self.shadow.traces = {}
+
+        self.log_games = 0
+        self.learned = 0
+        self.compactions = 0
+        if os.path.exists(self.log_path):
+            for game in iter_games(self.log_path):
+                self.apply(game.moves)
+                self.log_games += 1
+        self.replayed = self.log_games
+        self.writer = GameRecordWriter(self.log_path, "human")
+
+        self.games = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="online-learner", daemon=True)
+        self.thread.start()
+
+    def submit(self, moves, winner):
+        """Queue a finished game for learning; returns immediately."""
+        self.games.put((tuple(moves), winner))
+
+    def apply(self, moves):
+        """Learn one game on a copy of the live table, then swap the copy in."""
+        table = copy.copy(getattr(self.agent, self.table_attr))
+        if self.table_attr == "Q":
+            # rows the updates write are copied; everything else is shared with the live table
+            for state_key in game_states(moves):
+                if self.agent.folded:
+                    state_key = canonical_state(state_key)[0]
+                if state_key in table:
+                    table[state_key] = copy.copy(table[state_key])
+        setattr(self.shadow, self.table_attr, table)
+        # one table plays both sides; each side is replayed as its own episode so
+        # eligibility traces never mix X's and O's moves
+        for player in (1, -1):
+            self.shadow.start_episode()
+            replay_game(self.env, {player: self.shadow}, moves, learners=(player,))
+        setattr(self.agent, self.table_attr, table)
+        self.learned += 1
+
+    def _run(self):
+        while True:
+            item = self.games.get()
+            if item is None:
+                break
+            moves, winner = item
+            self.apply(moves)
+            self.writer.write(moves, winner)
+            self.writer.flush()
+            self.log_games += 1
+            if self.max_log_games and self.log_games >= self.max_log_games:
+                self.compact()
+
+    def compact(self):
+        """Save the current table as the model and start a new, empty update log."""
+        tmp = f"{self.model_path}.tmp"
+        self.shadow.save(tmp)
+        os.replace(tmp, self.model_path)
+        self.writer.close()
+        open(self.log_path, "wb").close()
+        self.writer = GameRecordWriter(self.log_path, "human")
+        self.log_games = 0
+        self.compactions += 1
+
+    def close(self):
+        """Learn the queued games and close the update log."""
+        self.games.put(None)
+        self.thread.join()
+        self.writer.close()
@@ -1,10 +1,19 @@
 from game import TicTacToe
-from agent import QLearningAgent
+from agent import load_agent
+from gamerecord import GameRecordWriter
+from online import MAX_LOG_GAMES, OnlineLearner
 from utils import make_state_key
 
-def play(qtable_path="qtable.pkl"):
-    agent = QLearningAgent()
-    agent.load(qtable_path)
+def play(qtable_path="qtable.pkl", record_path=None, book_path=None, learn=False, max_log_games=MAX_LOG_GAMES):
+    agent = load_agent(qtable_path)
+    if book_path:
+        from book import Book
+        agent.book = Book.load(book_path)
+    learner = None
+    if learn:
+        learner = OnlineLearner(agent, qtable_path, max_log_games=max_log_games)
+        if learner.replayed:
+            print(f"Replayed {learner.replayed} logged games onto the model")
     env = TicTacToe()
     board = env.reset()
     print("You play O. Input: number 0–8 (top-left = 0, bottom-right = 8)")
@@ -27,11 +36,36 @@ def play(qtable_path="qtable.pkl"):
             board, _, done, _ = env.step(move)
 
         if done:
+            if record_path:
+                with GameRecordWriter(record_path, "play") as recorder:
+                    recorder.write(env.history, env.winner)
+            if learner:
+                learner.submit(env.history, env.winner)
             env.render()
             if env.winner == 1: print("Agent wins!")
             elif env.winner == -1: print("You win!")
             else: print("Draw!")
+            if agent.book is not None:
+                print(f"Book hits: {agent.book.hits}/{agent.book.lookups} agent moves")
+            if learner:
+                learner.close()
+                saved = f", saved to {qtable_path}" if learner.compactions else f", {learner.log_games} games in {learner.log_path}"
+                print(f"Learned from this game{saved}")
             break
 
 if __name__ == "__main__":
-    play()
+    import argparse
+    from profiling import add_profile_argument, profiled
+
+    parser = argparse.ArgumentParser(description='Play TicTacToe against the trained agent in the console')
+    parser.add_argument('--model', type=str, default='qtable.pkl', help='Path to trained model file')
+    parser.add_argument('--record-games', type=str, default=None, help='Append finished games to this game record file')
+    parser.add_argument('--book', type=str, default=None, help='Opening book / endgame tablebase to consult first')
+    parser.add_argument('--learn', action='store_true', help='Learn from finished games (online learning)')
+    parser.add_argument('--learn-log-max', type=int, default=MAX_LOG_GAMES,
+                        help='Fold the update log into the model after this many games')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiled(args.profile):
+        play(args.model, args.record_games, args.book, args.learn, args.learn_log_max)
@@ -0,0 +1,41 @@
+"""
+Built-in reference players.
+They expose the same get_action(state_key, legal, training) interface as
+QLearningAgent, so they can be dropped into evaluate() or any game loop.
+"""
+
+import random
+from typing import List, Tuple
+
+from agent import load_agent
+from solver import best_actions
+
+BUILTIN_PLAYERS = ("random", "solver")
+
+
+class RandomPlayer:
+    """Plays a uniformly random legal move."""
+
+    def get_action(self, state_key: Tuple, legal: List[int], training=False) -> int:
+        return random.choice(legal)
+
+
+class PerfectPlayer:
+    """Plays a random move among the minimax-optimal ones."""
+
+    def get_action(self, state_key: Tuple, legal: List[int], training=False) -> int:
+        board, player = state_key
+        best = [a for a in best_actions(tuple(board), player) if a in legal]
+        return random.choice(best or legal)
+
+
+def load_player(spec: str):
+    """
+    Build a player from a spec string.
+    'random' and 'solver' are built-in players, anything else is a saved table path.
+    """
+    if spec == "random":
+        return RandomPlayer()
+    if spec == "solver":
+        return PerfectPlayer()
+    return load_agent(spec)
@@ -0,0 +1,136 @@
+"""
+Built-in profiling for train.py, evaluate.py and play.py (--profile PREFIX).
+
+While the wrapped code runs this collects
+    PREFIX.prof        cProfile stats (open with pstats or snakeviz)
+    PREFIX.collapsed   sampled call stacks in collapsed format ("a;b;c count"),
+                       readable by flamegraph.pl, speedscope or inferno
+    PREFIX.mem.txt     tracemalloc snapshots taken every `snapshot_every` seconds,
+                       attributed to lines of game.py, agent.py and utils.py
+and prints a short summary of the top time and memory hotspots at the end.
+"""
+
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+SAMPLE_INTERVAL = 0.001
+SNAPSHOT_EVERY = 5.0
+MEMORY_FILES = ("game.py", "agent.py", "utils.py")
+TOP = 10
+
+
+class Profiler:
+    """cProfile + sampled stacks + periodic tracemalloc snapshots for one block of code."""
+
+    def __init__(self, prefix="profile", sample_interval=SAMPLE_INTERVAL, snapshot_every=SNAPSHOT_EVERY,
+                 memory_files=MEMORY_FILES):
+        self.prefix = prefix
+        self.sample_interval = sample_interval
+        self.snapshot_every = snapshot_every
+        self.filters = [tracemalloc.Filter(True, f"*{os.sep}{name}") for name in memory_files]
+        self.profile = cProfile.Profile()
+        self.stacks = Counter()
+        self.snapshots = []
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def __enter__(self):
+        self._target = threading.get_ident()
+        self._start = time.perf_counter()
+        tracemalloc.start()
+        self._take_snapshot()
+        self._sampler = threading.Thread(target=self._sample, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.disable()
+        self._stop.set()
+        self._sampler.join()
+        self._take_snapshot()
+        tracemalloc.stop()
+        self.write()
+        self.summary()
+        return False
+
+    def _take_snapshot(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.filters)
+        self.snapshots.append((time.perf_counter() - self._start, snapshot))
+
+    def _sample(self):
+        """Sample the profiled thread's stack; runs on its own thread."""
+        next_snapshot = time.perf_counter() + self.snapshot_every
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            if time.perf_counter() >= next_snapshot:
+                self._take_snapshot()
+                next_snapshot += self.snapshot_every
+
+    def write(self):
+        self.profile.dump_stats(f"{self.prefix}.prof")
+
+        with open(f"{self.prefix}.collapsed", "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        with open(f"{self.prefix}.mem.txt", "w") as f:
+            first = self.snapshots[0][1]
+            for elapsed, snapshot in self.snapshots[1:]:
+                f.write(f"=== t={elapsed:.1f}s: {self._traced(snapshot) / 1024:.1f} KiB live ===\n")
+                for stat in snapshot.compare_to(first, "lineno")[:TOP * 2]:
+                    f.write(f"{stat}\n")
+                f.write("\n")
+
+    @staticmethod
+    def _traced(snapshot):
+        return sum(stat.size for stat in snapshot.statistics("filename"))
+
+    def summary(self, top=TOP):
+        elapsed = time.perf_counter() - self._start
+        print(f"\n=== Profile summary ({elapsed:.1f}s, {sum(self.stacks.values())} stack samples) ===")
+
+        out = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=out)
+        stats.sort_stats("tottime").print_stats(top)
+        print(f"Top {top} functions by own time:")
+        listing = out.getvalue()
+        print(listing[listing.find("   ncalls"):].rstrip())
+
+        first = self.snapshots[0][1]
+        last = self.snapshots[-1][1]
+        # peak over the interval snapshots, not only what is still alive at the end
+        peak_time, peak = max(self.snapshots, key=lambda item: self._traced(item[1]))
+        print(f"\nTop {top} allocation sites in {', '.join(MEMORY_FILES)} "
+              f"(peak {self._traced(peak) / 1024:.1f} KiB at t={peak_time:.1f}s):")
+        for stat in peak.compare_to(first, "lineno")[:top]:
+            frame = stat.traceback[0]
+            print(f"  {os.path.basename(frame.filename)}:{frame.lineno:<5} "
+                  f"{stat.size / 1024:9.1f} KiB  {stat.count:8d} blocks  (+{stat.size_diff / 1024:.1f} KiB)")
+        print(f"Live at end: {self._traced(last) / 1024:.1f} KiB")
+        print(f"Wrote {self.prefix}.prof, {self.prefix}.collapsed, {self.prefix}.mem.txt")
+
+
+def profiled(prefix=None, **kw):
+    """Profiler context for `prefix`, or a no-op context when profiling is off."""
+    return Profiler(prefix, **kw) if prefix else contextlib.nullcontext()
+
+
+def add_profile_argument(parser):
+    parser.add_argument('--profile', nargs='?', const='profile', default=None, metavar='PREFIX',
+                        help='Profile the run and write PREFIX.prof/.collapsed/.mem.txt (default prefix: profile)')
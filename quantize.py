@@ -0,0 +1,58 @@
+"""
+Export a Q-table in a quantized format and report how much the greedy policy changes.
+
+    python quantize.py qtable.pkl --dtype int8 --output qtable.q8
+
+Every format is compared against the full-precision table, so the smallest one
+that leaves play unchanged (0 flipped states) can be picked. Quantization shrinks
+the file only: loading decodes the values into an ordinary float table.
+"""
+
+import os
+import tempfile
+
+from agent import QLearningAgent, QUANT_DTYPES, load_agent
+
+
+def compare_formats(path, dtypes=tuple(QUANT_DTYPES)):
+    """Return {dtype: (file size, flipped states)} for each quantized format."""
+    original = load_agent(path)
+    if not isinstance(original, QLearningAgent):
+        raise ValueError(f"{path} is not a Q-table; quantized export is for Q-tables only")
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in dtypes:
+            out = os.path.join(tmp, f"table.{dtype}")
+            original.save_quantized(out, dtype)
+            quantized = QLearningAgent()
+            quantized.load(out)
+            report[dtype] = (os.path.getsize(out), original.policy_flips(quantized))
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Export a quantized Q-table (smaller file; loaded tables use full RAM)',
+                                     epilog='Quantization shrinks the file only: loading decodes every value back to '
+                                            'a float, so a loaded table uses as much RAM as the .pkl it came from.')
+    parser.add_argument('path', nargs='?', default='qtable.pkl', help='Full-precision Q-table')
+    parser.add_argument('--dtype', choices=list(QUANT_DTYPES), default='int8',
+                        help='Quantized value type for the file (RAM use after loading is unchanged)')
+    parser.add_argument('--output', type=str, default=None, help='Output path (default: <path>.<dtype>)')
+    args = parser.parse_args()
+
+    try:
+        report = compare_formats(args.path)
+    except ValueError as e:
+        parser.exit(1, f"Error: {e}\n")
+
+    base_size = os.path.getsize(args.path)
+    print(f"{'format':<10} {'bytes':>10} {'ratio':>7} {'flipped states':>15}")
+    print(f"{'pickle':<10} {base_size:>10} {1.0:>7.2f} {0:>15}")
+    for dtype, (size, flips) in report.items():
+        print(f"{dtype:<10} {size:>10} {size / base_size:>7.2f} {flips:>15}")
+
+    output = args.output or f"{os.path.splitext(args.path)[0]}.{args.dtype}"
+    load_agent(args.path).save_quantized(output, args.dtype)
+    print(f"\nWrote {output}")
@@ -1,7 +1,326 @@
+"""
+Q-table inspection utility.
+
+Streams through a pickled Q-table without building the nested-dict structure:
+each state's action map is yielded and dropped as soon as it has been read, so
+only the compact summaries below are held in memory.
+
+    python read_table.py summary qtable.pkl
+    python read_table.py top qtable.pkl --k 10
+    python read_table.py show qtable.pkl "x...o...."
+    python read_table.py diff qtable_X.pkl qtable.pkl
+
+Quantized tables (quantize.py) are read as well, decoded one state at a time.
+"""
+
+import heapq
 import pickle
+import pickletools
+from collections import Counter
+from typing import Dict, Iterator, Tuple
+
+from agent import QUANT_FOLDED, QUANT_HEADER, QUANT_MAGIC, QLearningAgent
+from utils import canonical_state
+
+SYMBOLS = {1: "X", -1: "O", 0: " "}
+HIST_BINS = 10
+
+# Marks the memo slot of an action map; those are never referenced twice
+_ROW = object()
+
+
+def _stream_pickle(f) -> Iterator[Tuple]:
+    """
+    Minimal pickle interpreter for the {state_key: {action: q}} layout written by
+    QLearningAgent.save(). Items set on the outer dict are yielded instead of stored.
+    Raises ValueError on opcodes outside that layout.
+    """
+    stack, marks, memo = [], [], {}
+    outer = None
+
+    def set_items(items):
+        target = stack[-1]
+        if target is outer:
+            yield from items
+        else:
+            target.update(items)
+
+    for op, arg, _ in pickletools.genops(f):
+        name = op.name
+        if name in ("PROTO", "FRAME"):
+            continue
+        elif name == "STOP":
+            return
+        elif name == "MARK":
+            marks.append(len(stack))
+        elif name == "EMPTY_DICT":
+            d = {}
+            if outer is None:
+                outer = d
+            stack.append(d)
+        elif name in ("BININT", "BININT1", "BININT2", "LONG1", "BINFLOAT"):
+            stack.append(arg)
+        elif name == "NEWTRUE":
+            stack.append(True)
+        elif name == "NEWFALSE":
+            stack.append(False)
+        elif name == "NONE":
+            stack.append(None)
+        elif name == "EMPTY_TUPLE":
+            stack.append(())
+        elif name in ("TUPLE1", "TUPLE2", "TUPLE3"):
+            n = int(name[-1])
+            items = tuple(stack[-n:])
+            del stack[-n:]
+            stack.append(items)
+        elif name == "TUPLE":
+            k = marks.pop()
+            items = tuple(stack[k:])
+            del stack[k:]
+            stack.append(items)
+        elif name in ("MEMOIZE", "BINPUT", "LONG_BINPUT"):
+            key = len(memo) if name == "MEMOIZE" else arg
+            top = stack[-1]
+            memo[key] = _ROW if isinstance(top, dict) else top
+        elif name in ("BINGET", "LONG_BINGET"):
+            obj = memo[arg]
+            if obj is _ROW:
+                raise ValueError("shared action maps are not supported")
+            stack.append(obj)
+        elif name == "SETITEM":
+            value = stack.pop()
+            key = stack.pop()
+            yield from set_items([(key, value)])
+        elif name == "SETITEMS":
+            k = marks.pop()
+            flat = stack[k:]
+            del stack[k:]
+            yield from set_items(list(zip(flat[::2], flat[1::2])))
+        else:
+            raise ValueError(f"unsupported pickle opcode {name}")
+
+
+def iter_qtable(path) -> Iterator[Tuple[Tuple, Dict[int, float]]]:
+    """Yield (state_key, {action: q}) pairs from a pickled or quantized Q-table file."""
+    with open(path, "rb") as f:
+        if f.read(len(QUANT_MAGIC)) == QUANT_MAGIC:
+            # quantized rows are decoded one at a time from the compact file contents
+            f.seek(0)
+            _, rows = QLearningAgent._iter_quantized(f)
+            yield from rows
+            return
+    yielded = False
+    try:
+        with open(path, "rb") as f:
+            for item in _stream_pickle(f):
+                yielded = True
+                yield item
+        return
+    except ValueError:
+        # rows already handed out cannot be taken back; a fallback would repeat them
+        if yielded:
+            raise
+    # Unknown layout: fall back to a regular (non-streaming) load
+    with open(path, "rb") as f:
+        raw = pickle.load(f)
+    yield from raw.items()
+
+
+def table_folded(path) -> bool:
+    """Whether a table file holds symmetry-folded (canonical) states only."""
+    with open(path, "rb") as f:
+        if f.read(len(QUANT_MAGIC)) == QUANT_MAGIC:
+            f.seek(0)
+            return bool(QUANT_HEADER.unpack(f.read(QUANT_HEADER.size))[2] & QUANT_FOLDED)
+        f.seek(0)
+        # the flag is in the optional pickle object after the table; skip the table row by row
+        try:
+            for _ in _stream_pickle(f):
+                pass
+        except ValueError:
+            f.seek(0)
+            pickle.load(f)
+        try:
+            extra = pickle.load(f)
+        except EOFError:
+            return False
+    return isinstance(extra, dict) and extra.get("folded", False)
+
+
+def parse_board(text: str) -> Tuple[int, ...]:
+    """Parse a 9-character board such as 'x...o....' (x/o, anything else is empty)."""
+    cells = text.replace("|", "").replace("\n", "")
+    if len(cells) != 9:
+        raise ValueError(f"board must have 9 cells, got {len(cells)}: {text!r}")
+    return tuple(1 if c in "xX" else -1 if c in "oO" else 0 for c in cells)
+
+
+def format_grid(board, values: Dict[int, float]) -> str:
+    """ASCII grid: marks on occupied cells, Q-values on empty ones."""
+    lines = []
+    for r in range(3):
+        cells = []
+        for c in range(3):
+            idx = 3 * r + c
+            if board[idx] != 0:
+                cells.append(f"{SYMBOLS[board[idx]]:^7}")
+            elif idx in values:
+                cells.append(f"{values[idx]:^+7.3f}")
+            else:
+                cells.append(f"{'.':^7}")
+        lines.append("|".join(cells))
+        if r < 2:
+            lines.append("+".join(["-" * 7] * 3))
+    return "\n".join(lines)
+
+
+def summarize(path):
+    states = entries = ties = all_zero = 0
+    by_move = Counter()
+    hist = [0] * HIST_BINS
+    lo = hi = None
+
+    for (board, player), row in iter_qtable(path):
+        states += 1
+        entries += len(row)
+        by_move[sum(1 for v in board if v != 0)] += 1
+        if not row or all(q == 0.0 for q in row.values()):
+            all_zero += 1
+            continue
+        best = max(row.values())
+        if len(row) > 1 and sum(1 for q in row.values() if q == best) > 1:
+            ties += 1
+        for q in row.values():
+            lo = q if lo is None else min(lo, q)
+            hi = q if hi is None else max(hi, q)
+            b = int((min(max(q, -1.0), 1.0) + 1.0) / 2.0 * HIST_BINS)
+            hist[min(b, HIST_BINS - 1)] += 1
+
+    print(f"States: {states}   entries: {entries}")
+    print(f"All-zero rows: {all_zero}   rows with tied best action: {ties}")
+    if lo is not None:
+        print(f"Value range: [{lo:+.4f}, {hi:+.4f}]")
+    print("\nStates by move number (pieces on board):")
+    for move in sorted(by_move):
+        print(f"  {move}: {by_move[move]}")
+    print("\nNon-zero-row value histogram (clamped to [-1, 1]):")
+    peak = max(hist) or 1
+    for i, count in enumerate(hist):
+        left = -1.0 + 2.0 * i / HIST_BINS
+        print(f"  [{left:+.1f}, {left + 2.0 / HIST_BINS:+.1f})  {count:>7}  {'#' * (40 * count // peak)}")
+
+
+def top_positions(path, k=10):
+    """Best and worst states by their best Q-value (all-zero rows skipped)."""
+    best, worst = [], []
+    for n, (state_key, row) in enumerate(iter_qtable(path)):
+        if not row or all(q == 0.0 for q in row.values()):
+            continue
+        value = max(row.values())
+        item = (value, n, state_key, row)
+        if len(best) < k:
+            heapq.heappush(best, item)
+        elif value > best[0][0]:
+            heapq.heapreplace(best, item)
+        neg = (-value, n, state_key, row)
+        if len(worst) < k:
+            heapq.heappush(worst, neg)
+        elif -value > worst[0][0]:
+            heapq.heapreplace(worst, neg)
+
+    for title, heap, sign in (("Best", best, 1), ("Worst", worst, -1)):
+        print(f"\n=== {title} {len(heap)} positions ===")
+        for value, _, (board, player), row in sorted(heap, reverse=True):
+            print(f"\n{SYMBOLS[player]} to move, best Q = {sign * value:+.4f}")
+            print(format_grid(board, row))
+
+
+def show_board(path, board, player=None):
+    if player is None:
+        # X moves first, so X is to move whenever the piece counts are equal
+        player = 1 if board.count(1) == board.count(-1) else -1
+    state_key, perm = (board, player), None
+    if table_folded(path):
+        # only the canonical variant is stored; its action i is action perm[i] here
+        state_key, perm = canonical_state(state_key)
+    for key, row in iter_qtable(path):
+        if key == state_key:
+            if perm is not None:
+                row = {perm[a]: q for a, q in row.items()}
+            print(f"{SYMBOLS[player]} to move" + (" (folded table, canonical row mapped back):" if perm is not None else ":"))
+            print(format_grid(board, row))
+            return
+    print(f"State not in table ({SYMBOLS[player]} to move):")
+    print(format_grid(board, {}))
+
+
+def diff_tables(path_a, path_b, k=10, tol=1e-9):
+    """Entry-by-entry diff. Table A is flattened into memory, table B is streamed."""
+    folded = [path for path in (path_a, path_b) if table_folded(path)]
+    if folded:
+        print(f"Note: {', '.join(folded)} {'is' if len(folded) == 1 else 'are'} symmetry-folded "
+              f"(canonical states only); entries are compared as stored")
+    a = {}
+    for state_key, row in iter_qtable(path_a):
+        for action, q in row.items():
+            a[(state_key, action)] = q
+
+    added = changed = same = 0
+    biggest = []
+    for state_key, row in iter_qtable(path_b):
+        for action, q in row.items():
+            old = a.pop((state_key, action), None)
+            if old is None:
+                added += 1
+                continue
+            delta = abs(q - old)
+            if delta <= tol:
+                same += 1
+                continue
+            changed += 1
+            item = (delta, state_key, action, old, q)
+            if len(biggest) < k:
+                heapq.heappush(biggest, item)
+            elif delta > biggest[0][0]:
+                heapq.heapreplace(biggest, item)
+
+    print(f"Entries only in {path_a}: {len(a)}")
+    print(f"Entries only in {path_b}: {added}")
+    print(f"Changed: {changed}   unchanged: {same}")
+    if biggest:
+        print(f"\nLargest {len(biggest)} changes:")
+        for delta, (board, player), action, old, new in sorted(biggest, reverse=True):
+            cells = "".join({1: "x", -1: "o", 0: "."}[v] for v in board)
+            print(f"  {cells} {SYMBOLS[player]} a={action}: {old:+.4f} -> {new:+.4f} (|d|={delta:.4f})")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect Q-table files')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('summary', help='State counts, value histogram, ties and all-zero rows')
+    p.add_argument('path', nargs='?', default='qtable.pkl')
+    p = sub.add_parser('top', help='Top-k best and worst positions')
+    p.add_argument('path', nargs='?', default='qtable.pkl')
+    p.add_argument('--k', type=int, default=5)
+    p = sub.add_parser('show', help='Show Q-values of one board')
+    p.add_argument('path')
+    p.add_argument('board', help="9 cells row by row, e.g. 'x...o....'")
+    p.add_argument('--player', choices=['x', 'o'], default=None, help='Player to move (default: from piece counts)')
+    p = sub.add_parser('diff', help='Entry-by-entry diff of two tables')
+    p.add_argument('path_a')
+    p.add_argument('path_b')
+    p.add_argument('--k', type=int, default=10)
 
-with open("qtable.pkl", "rb") as f:
-    qtable = pickle.load(f)
+    args = parser.parse_args()
 
-print(qtable)
-print(len(qtable))
+    if args.command == 'summary':
+        summarize(args.path)
+    elif args.command == 'top':
+        top_positions(args.path, args.k)
+    elif args.command == 'show':
+        player = None if args.player is None else (1 if args.player == 'x' else -1)
+        show_board(args.path, parse_board(args.board), player)
+    elif args.command == 'diff':
+        diff_tables(args.path_a, args.path_b, args.k)
@@ -0,0 +1,217 @@
+"""
+Persistent history of training and evaluation runs.
+
+Every run of train.py / evaluate.py is recorded in a local SQLite database with its
+configuration, the code version, per-interval metrics and final results. Metric
+rows are buffered in memory and written in batches so logging does not slow the
+training loop.
+
+CLI:
+    python runlog.py list
+    python runlog.py show RUN_ID
+    python runlog.py compare RUN_ID RUN_ID [...]
+    python runlog.py export RUN_ID [--metric NAME] [--output FILE]
+"""
+
+import csv
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from typing import Dict, Optional
+
+DB_FILE = "runs.db"
+FLUSH_EVERY = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    script TEXT NOT NULL,
+    config TEXT NOT NULL,
+    code_version TEXT,
+    started TEXT NOT NULL,
+    finished TEXT,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL,
+    step INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value REAL,
+    time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metrics_run ON metrics (run_id, name, step);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, name)
+);
+"""
+
+
+def code_version() -> str:
+    """Git commit of the working tree (with a '-dirty' suffix), or a hash of the sources."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=here,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        h = hashlib.sha1()
+        for path in sorted(glob.glob(os.path.join(here, "*.py"))):
+            with open(path, "rb") as f:
+                h.update(f.read())
+        return "src-" + h.hexdigest()[:12]
+
+
+def open_db(path=DB_FILE) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class Run:
+    """A single recorded run. Metrics are buffered and flushed in batches."""
+
+    def __init__(self, conn: sqlite3.Connection, run_id: int, flush_every=FLUSH_EVERY):
+        self.conn = conn
+        self.id = run_id
+        self.flush_every = flush_every
+        self._buffer = []
+
+    def log_metrics(self, step: int, metrics: Dict[str, float]):
+        now = time.time()
+        self._buffer.extend((self.id, step, name, value, now) for name, value in metrics.items())
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def log_results(self, results: Dict[str, float]):
+        self.conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                              [(self.id, name, value) for name, value in results.items()])
+        self.conn.commit()
+
+    def flush(self):
+        if self._buffer:
+            self.conn.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?, ?)", self._buffer)
+            self.conn.commit()
+            self._buffer = []
+
+    def finish(self, status="finished"):
+        self.flush()
+        self.conn.execute("UPDATE runs SET finished = ?, status = ? WHERE id = ?",
+                          (time.strftime("%Y-%m-%d %H:%M:%S"), status, self.id))
+        self.conn.commit()
+        self.conn.close()
+
+
+def start_run(script: str, config: Dict, db_path=DB_FILE) -> Run:
+    conn = open_db(db_path)
+    cur = conn.execute("INSERT INTO runs (script, config, code_version, started, status) VALUES (?, ?, ?, ?, ?)",
+                       (script, json.dumps(config, sort_keys=True), code_version(),
+                        time.strftime("%Y-%m-%d %H:%M:%S"), "running"))
+    conn.commit()
+    return Run(conn, cur.lastrowid)
+
+
+def list_runs(conn: sqlite3.Connection):
+    print(f"{'ID':>4}  {'Script':<12} {'Started':<20} {'Status':<9} {'Version':<14} Config")
+    for run_id, script, config, version, started, status in conn.execute(
+            "SELECT id, script, config, code_version, started, status FROM runs ORDER BY id"):
+        print(f"{run_id:>4}  {script:<12} {started:<20} {status:<9} {version or '':<14} {config}")
+
+
+def run_summary(conn: sqlite3.Connection, run_id: int) -> Optional[Dict]:
+    row = conn.execute("SELECT script, config, code_version, started, finished, status FROM runs WHERE id = ?",
+                       (run_id,)).fetchone()
+    if row is None:
+        return None
+    script, config, version, started, finished, status = row
+    results = dict(conn.execute("SELECT name, value FROM results WHERE run_id = ?", (run_id,)))
+    # last value of every metric series
+    last = dict(conn.execute("""
+        SELECT name, value FROM metrics m WHERE run_id = ? AND step = (
+            SELECT MAX(step) FROM metrics WHERE run_id = m.run_id AND name = m.name)
+    """, (run_id,)))
+    return {"script": script, "config": json.loads(config), "code_version": version, "started": started,
+            "finished": finished, "status": status, "results": results, "last_metrics": last}
+
+
+def compare_runs(conn: sqlite3.Connection, run_ids):
+    summaries = {run_id: run_summary(conn, run_id) for run_id in run_ids}
+    missing = [run_id for run_id, s in summaries.items() if s is None]
+    if missing:
+        print(f"Unknown run id(s): {missing}")
+        return
+
+    def rows(section):
+        names = sorted({name for s in summaries.values() for name in s[section]})
+        for name in names:
+            values = [summaries[r][section].get(name) for r in run_ids]
+            print(f"  {name:<24}" + "".join(f"{_fmt(v):>16}" for v in values))
+
+    print(f"  {'':<24}" + "".join(f"{'run ' + str(r):>16}" for r in run_ids))
+    print(f"  {'code_version':<24}" + "".join(f"{str(summaries[r]['code_version']):>16}" for r in run_ids))
+    print("Config:")
+    rows("config")
+    print("Final metrics:")
+    rows("last_metrics")
+    print("Results:")
+    rows("results")
+
+
+def export_metrics(conn: sqlite3.Connection, run_id: int, metric=None, out=sys.stdout):
+    query = "SELECT step, name, value, time FROM metrics WHERE run_id = ?"
+    params = [run_id]
+    if metric:
+        query += " AND name = ?"
+        params.append(metric)
+    writer = csv.writer(out)
+    writer.writerow(["step", "name", "value", "time"])
+    writer.writerows(conn.execute(query + " ORDER BY name, step", params))
+
+
+def _fmt(value):
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return "-" if value is None else str(value)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect recorded training and evaluation runs')
+    parser.add_argument('--db', type=str, default=DB_FILE, help='Run history database')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='List all runs')
+    show = sub.add_parser('show', help='Show one run')
+    show.add_argument('run_id', type=int)
+    compare = sub.add_parser('compare', help='Compare runs side by side')
+    compare.add_argument('run_ids', type=int, nargs='+')
+    export = sub.add_parser('export', help='Export metric series as CSV')
+    export.add_argument('run_id', type=int)
+    export.add_argument('--metric', type=str, default=None, help='Only export this metric')
+    export.add_argument('--output', type=str, default=None, help='Output file (default: stdout)')
+
+    args = parser.parse_args()
+    conn = open_db(args.db)
+
+    if args.command == 'list':
+        list_runs(conn)
+    elif args.command == 'show':
+        summary = run_summary(conn, args.run_id)
+        print(json.dumps(summary, indent=2) if summary else f"Unknown run id {args.run_id}")
+    elif args.command == 'compare':
+        compare_runs(conn, args.run_ids)
+    elif args.command == 'export':
+        if args.output:
+            with open(args.output, 'w', newline='') as f:
+                export_metrics(conn, args.run_id, args.metric, f)
+        else:
+            export_metrics(conn, args.run_id, args.metric)
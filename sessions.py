@@ -0,0 +1,191 @@
+"""
+Headless manager for many concurrent games against one shared agent.
+
+All sessions share a single read-only QLearningAgent (lookups go through the
+non-inserting QLearningAgent.q_values read path, so the table never grows). Each
+session is a small __slots__ object with a bytearray board and move history.
+Sessions idle for longer than the timeout are evicted.
+
+    python sessions.py --stress 10000
+"""
+
+import random
+import threading
+import time
+import tracemalloc
+from typing import Dict, Optional
+
+from agent import QLearningAgent, load_agent
+from solver import board_winner
+from utils import make_state_key
+
+IDLE_TIMEOUT = 600.0
+EVICT_EVERY = 1000  # sessions created between automatic idle sweeps
+
+# Board cells are stored as bytes: 0 = empty, 1 = X, 2 = O
+_DECODE = (0, 1, -1)
+
+
+class Session:
+    __slots__ = ("id", "board", "moves", "agent_id", "created", "last_active", "winner")
+
+    def __init__(self, session_id: int, agent_id: int, now: float):
+        self.id = session_id
+        self.board = bytearray(9)
+        self.moves = bytearray()
+        self.agent_id = agent_id
+        self.created = now
+        self.last_active = now
+        self.winner = None
+
+    @property
+    def current_player(self) -> int:
+        return 1 if len(self.moves) % 2 == 0 else -1
+
+    @property
+    def done(self) -> bool:
+        return self.winner is not None
+
+    def board_tuple(self):
+        return tuple(_DECODE[v] for v in self.board)
+
+    def legal_actions(self):
+        return [i for i, v in enumerate(self.board) if v == 0]
+
+    def play(self, action: int):
+        player = self.current_player
+        self.board[action] = 1 if player == 1 else 2
+        self.moves.append(action)
+        self.winner = board_winner(self.board_tuple())
+
+    def state(self) -> Dict:
+        return {"id": self.id, "board": self.board_tuple(), "moves": list(self.moves),
+                "current_player": self.current_player, "agent_id": self.agent_id,
+                "done": self.done, "winner": self.winner}
+
+
+class SessionManager:
+    """Create, move, query and close games; all sessions share one agent."""
+
+    def __init__(self, agent: QLearningAgent, idle_timeout=IDLE_TIMEOUT):
+        self.agent = agent
+        self.idle_timeout = idle_timeout
+        self.sessions: Dict[int, Session] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def create(self, agent_starts=True) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            session_id = self._next_id
+            self._next_id += 1
+            session = Session(session_id, 1 if agent_starts else -1, now)
+            self.sessions[session_id] = session
+            if self._next_id % EVICT_EVERY == 0:
+                self._evict(now)
+            if agent_starts:
+                self._agent_move(session)
+            return session.state()
+
+    def move(self, session_id: int, action: int) -> Dict:
+        """Play the human's move and the agent's reply."""
+        with self._lock:
+            session = self._get(session_id)
+            if session.done:
+                raise RuntimeError("Game already finished")
+            if session.current_player == session.agent_id:
+                raise RuntimeError("Not the player's turn")
+            if not 0 <= action < 9 or session.board[action] != 0:
+                raise ValueError(f"Illegal move {action}")
+            session.play(action)
+            session.last_active = time.monotonic()
+            if not session.done:
+                self._agent_move(session)
+            return session.state()
+
+    def query(self, session_id: int) -> Dict:
+        with self._lock:
+            return self._get(session_id).state()
+
+    def close(self, session_id: int) -> Dict:
+        with self._lock:
+            return self.sessions.pop(session_id).state()
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop sessions idle for longer than the timeout; returns how many."""
+        with self._lock:
+            return self._evict(time.monotonic() if now is None else now)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def _get(self, session_id: int) -> Session:
+        try:
+            return self.sessions[session_id]
+        except KeyError:
+            raise KeyError(f"Unknown or expired session {session_id}") from None
+
+    def _evict(self, now: float) -> int:
+        cutoff = now - self.idle_timeout
+        stale = [sid for sid, s in self.sessions.items() if s.last_active < cutoff]
+        for sid in stale:
+            del self.sessions[sid]
+        return len(stale)
+
+    def _agent_move(self, session: Session):
+        state_key = make_state_key(session.board_tuple(), session.current_player)
+        session.play(self.agent.get_action(state_key, session.legal_actions(), training=False))
+
+
+def stress_test(agent: QLearningAgent, num_sessions=10000, seed=0):
+    """Open `num_sessions` games, play them all to the end with random human moves."""
+    random.seed(seed)
+    manager = SessionManager(agent)
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for i in range(num_sessions):
+        manager.create(agent_starts=i % 2 == 0)
+    create_time = time.perf_counter() - start
+    per_session = (tracemalloc.get_traced_memory()[0] - base) / num_sessions
+    tracemalloc.stop()
+
+    moves = 0
+    open_ids = list(manager.sessions)
+    start = time.perf_counter()
+    while open_ids:
+        still_open = []
+        # one move per session per round, so all games are in flight at once
+        for sid in open_ids:
+            state = manager.query(sid)
+            legal = [i for i, v in enumerate(state["board"]) if v == 0]
+            state = manager.move(sid, random.choice(legal))
+            moves += 1
+            if not state["done"]:
+                still_open.append(sid)
+        open_ids = still_open
+    play_time = time.perf_counter() - start
+
+    results = {1: 0, -1: 0, 0: 0}
+    for session in manager.sessions.values():
+        results[0 if session.winner == 0 else (1 if session.winner == session.agent_id else -1)] += 1
+
+    print(f"Sessions:            {num_sessions}")
+    print(f"Memory per session:  {per_session:.0f} bytes")
+    print(f"Create rate:         {num_sessions / create_time:,.0f} sessions/sec")
+    print(f"Move rate:           {moves / play_time:,.0f} human moves/sec (each with an agent reply)")
+    print(f"Agent results:       {results[1]} wins, {results[0]} draws, {results[-1]} losses")
+    evicted = manager.evict_idle(time.monotonic() + manager.idle_timeout + 1)
+    print(f"Evicted when idle:   {evicted}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Headless multi-session game manager')
+    parser.add_argument('--model', type=str, default='qtable.pkl', help='Path to trained model file')
+    parser.add_argument('--stress', type=int, default=10000, help='Number of concurrent sessions to simulate')
+    args = parser.parse_args()
+
+    stress_test(load_agent(args.model), args.stress)
@@ -0,0 +1,65 @@
+"""
+Exact minimax solver for TicTacToe.
+The full game tree is small enough to solve on demand, so results are memoized
+per (board, player) and reused by the perfect player and analysis tools.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from game import LINES
+
+
+def board_winner(board: Tuple[int, ...]) -> Optional[int]:
+    """Return 1 or -1 for a won board, 0 for a full board, None if still open."""
+    for a, b, c in LINES:
+        s = board[a] + board[b] + board[c]
+        if s == 3:
+            return 1
+        if s == -3:
+            return -1
+    if all(x != 0 for x in board):
+        return 0
+    return None
+
+
+@lru_cache(maxsize=None)
+def solve(board: Tuple[int, ...], player: int) -> int:
+    """
+    Game value of `board` with `player` to move, from that player's perspective.
+    1 = forced win, 0 = draw, -1 = forced loss.
+    """
+    winner = board_winner(board)
+    if winner is not None:
+        return 0 if winner == 0 else (1 if winner == player else -1)
+
+    best = -1
+    for a in range(9):
+        if board[a] != 0:
+            continue
+        child = board[:a] + (player,) + board[a + 1:]
+        value = -solve(child, -player)
+        if value > best:
+            best = value
+            if best == 1:
+                break
+    return best
+
+
+def action_values(board: Tuple[int, ...], player: int) -> Dict[int, int]:
+    """Exact value of every legal move for `player` on `board`."""
+    values = {}
+    for a in range(9):
+        if board[a] == 0:
+            child = board[:a] + (player,) + board[a + 1:]
+            values[a] = -solve(child, -player)
+    return values
+
+
+def best_actions(board: Tuple[int, ...], player: int) -> List[int]:
+    """All moves that keep the best achievable game value."""
+    values = action_values(board, player)
+    if not values:
+        return []
+    best = max(values.values())
+    return [a for a, v in values.items() if v == best]
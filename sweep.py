@@ -0,0 +1,182 @@
+"""
+Hyperparameter sweep over the Q-learning training parameters.
+
+Configurations (grid or random search over alpha, gamma, the epsilon schedule and
+the episode count) are trained in parallel worker processes and scored with
+evaluate.score_agents(). Every finished trial is stored in a SQLite database, so an
+interrupted sweep resumes where it stopped and finished trials are never re-run.
+With --rungs > 1 the sweep uses successive halving: all configurations start on a
+small episode budget and only the best 1/eta advance to the next, larger budget.
+"""
+
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import random
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+from evaluate import score_agents
+from train import EPISODES, EPSILON_DECAY, MIN_EPSILON, train
+
+DB_FILE = "sweep.db"
+PARAMS = ("alpha", "gamma", "epsilon_decay", "min_epsilon", "episodes")
+
+
+def config_key(config: Dict) -> str:
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def grid_configs(space: Dict[str, List]) -> List[Dict]:
+    """Every combination of the values in `space`."""
+    names = [p for p in PARAMS if p in space]
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_configs(space: Dict[str, List], samples: int, seed=0) -> List[Dict]:
+    """
+    `samples` random configurations. Parameters given as two values are sampled
+    uniformly from that range (log-uniform for alpha); longer lists are sampled as choices.
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(samples):
+        config = {}
+        for name in PARAMS:
+            values = space[name]
+            if len(values) == 2 and name != "episodes":
+                lo, hi = values
+                if name == "alpha" and lo > 0:
+                    config[name] = round(lo * (hi / lo) ** rng.random(), 6)
+                else:
+                    config[name] = round(rng.uniform(lo, hi), 6)
+            else:
+                config[name] = rng.choice(values)
+        configs.append(config)
+    return configs
+
+
+def open_db(path=DB_FILE) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS trials (
+            config_key TEXT NOT NULL,
+            budget INTEGER NOT NULL,
+            params TEXT NOT NULL,
+            score REAL,
+            details TEXT,
+            seconds REAL,
+            finished TEXT,
+            PRIMARY KEY (config_key, budget)
+        )
+    """)
+    conn.commit()
+    return conn
+
+
+def finished_scores(conn: sqlite3.Connection, budget_of, configs: List[Dict], rung: int) -> Dict[str, float]:
+    scores = {}
+    for config in configs:
+        row = conn.execute("SELECT score FROM trials WHERE config_key = ? AND budget = ?",
+                           (config_key(config), budget_of(config, rung))).fetchone()
+        if row is not None:
+            scores[config_key(config)] = row[0]
+    return scores
+
+
+def run_trial(config: Dict, budget: int, use_csv_data: bool, eval_games: int, seed: int) -> Dict:
+    """Train one configuration for `budget` episodes and score it (runs in a worker)."""
+    random.seed(seed)
+    start = time.time()
+    # Training and pre-training log to stdout; keep the sweep output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent_X, agent_O = train(episodes=budget, save_path=None, use_csv_data=use_csv_data,
+                                 alpha=config["alpha"], gamma=config["gamma"],
+                                 epsilon_decay=config["epsilon_decay"], min_epsilon=config["min_epsilon"],
+                                 log_every=0)
+    details = score_agents(agent_X, agent_O, eval_games)
+    return {"score": details.pop("score"), "details": details, "seconds": time.time() - start}
+
+
+def sweep(configs: List[Dict], rungs=1, eta=3, workers=None, use_csv_data=False, eval_games=500, db_path=DB_FILE):
+    """
+    Run all `configs` (with successive halving when rungs > 1) and return the final
+    rung's (score, config) pairs, best first.
+    """
+    conn = open_db(db_path)
+
+    def budget_of(config, rung):
+        return max(1, int(config["episodes"] / eta ** (rungs - 1 - rung)))
+
+    alive = configs
+    for rung in range(rungs):
+        done = finished_scores(conn, budget_of, alive, rung)
+        todo = [c for c in alive if config_key(c) not in done]
+        print(f"Rung {rung + 1}/{rungs}: {len(alive)} configs, {len(done)} finished, {len(todo)} to run")
+
+        if todo:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {}
+                for config in todo:
+                    key = config_key(config)
+                    seed = int(key[:8], 16) + rung
+                    futures[pool.submit(run_trial, config, budget_of(config, rung), use_csv_data, eval_games, seed)] = config
+                for future in as_completed(futures):
+                    config = futures[future]
+                    result = future.result()
+                    conn.execute("INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 (config_key(config), budget_of(config, rung), json.dumps(config, sort_keys=True),
+                                  result["score"], json.dumps(result["details"]), result["seconds"],
+                                  time.strftime("%Y-%m-%d %H:%M:%S")))
+                    conn.commit()
+                    done[config_key(config)] = result["score"]
+                    print(f"  score={result['score']:.3f} ({result['seconds']:.1f}s) {config}")
+
+        ranked = sorted(alive, key=lambda c: done[config_key(c)], reverse=True)
+        if rung < rungs - 1:
+            alive = ranked[:max(1, len(ranked) // eta)]
+        else:
+            alive = ranked
+
+    conn.close()
+    return [(done[config_key(c)], c) for c in alive]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Hyperparameter sweep for Q-learning training')
+    parser.add_argument('--alpha', type=float, nargs='+', default=[0.1, 0.3, 0.5], help='Learning rates')
+    parser.add_argument('--gamma', type=float, nargs='+', default=[0.9, 0.99], help='Discount factors')
+    parser.add_argument('--epsilon-decay', type=float, nargs='+', default=[EPSILON_DECAY], help='Epsilon decay rates')
+    parser.add_argument('--min-epsilon', type=float, nargs='+', default=[MIN_EPSILON], help='Epsilon floors')
+    parser.add_argument('--episodes', type=int, nargs='+', default=[EPISODES], help='Training episodes (full budget)')
+    parser.add_argument('--search', choices=['grid', 'random'], default='grid', help='Search strategy')
+    parser.add_argument('--samples', type=int, default=20, help='Number of random-search samples')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for random search')
+    parser.add_argument('--rungs', type=int, default=1, help='Successive-halving rungs (1 = no halving)')
+    parser.add_argument('--eta', type=int, default=3, help='Halving factor between rungs')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--eval-games', type=int, default=500, help='Games per evaluation match')
+    parser.add_argument('--csv', action='store_true', help='Use CSV pre-training in every trial')
+    parser.add_argument('--db', type=str, default=DB_FILE, help='SQLite results database')
+
+    args = parser.parse_args()
+
+    space = {"alpha": args.alpha, "gamma": args.gamma, "epsilon_decay": args.epsilon_decay,
+             "min_epsilon": args.min_epsilon, "episodes": args.episodes}
+    if args.search == "grid":
+        configs = grid_configs(space)
+    else:
+        configs = random_configs(space, args.samples, args.seed)
+
+    results = sweep(configs, rungs=args.rungs, eta=args.eta, workers=args.workers,
+                    use_csv_data=args.csv, eval_games=args.eval_games, db_path=args.db)
+
+    print("\n=== Best configurations ===")
+    for score, config in results[:10]:
+        print(f"  {score:.3f}  {config}")
@@ -0,0 +1,318 @@
+"""
+Tests for Q-table storage and lookup: quantized export, compaction,
+symmetric lookups, the solved opening book, eligibility traces,
+afterstate values, visit counts, the value network, online learning and
+streamed table reads.
+"""
+
+import os
+import pickle
+import tempfile
+
+import pytest
+
+from agent import AfterstateAgent, QLambdaAgent, QLearningAgent, load_agent
+from book import Book
+from compact import compact_table
+from read_table import _stream_pickle, format_grid, iter_qtable, show_board, table_folded
+from solver import best_actions
+from utils import SYMMETRIES, canonical_state, transform_board
+
+
+def make_agent():
+    agent = QLearningAgent()
+    agent.Q[((1, -1, 0, 0, 0, 0, 0, 0, 0), 1)].update({2: 0.75, 8: -0.5})
+    agent.Q[((0, 0, 0, 0, 0, 0, 0, 0, 0), 1)].update({4: 0.25, 0: 0.125})
+    return agent
+
+
+def test_quantized_roundtrip():
+    agent = make_agent()
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype, tol in (("float16", 1e-3), ("int8", 1e-2)):
+            path = os.path.join(tmp, f"table.{dtype}")
+            agent.save_quantized(path, dtype)
+            loaded = QLearningAgent()
+            loaded.load(path)
+            for state_key, row in agent.Q.items():
+                for action, q in row.items():
+                    assert abs(loaded.Q[state_key][action] - q) < tol
+            assert agent.policy_flips(loaded) == 0
+
+
+def test_int8_keeps_zero_entries_tied():
+    agent = make_agent()
+    state = ((1, -1, 0, 1, 0, 0, -1, 0, 0), 1)
+    agent.Q[state].update({4: 0.0, 5: 0.0})
+    legal = [2, 4, 5, 7, 8]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.int8")
+        agent.save_quantized(path, "int8")
+        loaded = QLearningAgent()
+        loaded.load(path)
+    assert loaded.Q[state] == {4: 0.0, 5: 0.0}
+    assert loaded.greedy_actions(state, legal) == agent.greedy_actions(state, legal) == legal
+    assert agent.policy_flips(loaded) == 0
+
+
+def test_get_action_does_not_insert():
+    agent = make_agent()
+    before = len(agent.Q)
+    agent.get_action(((0, 1, 0, 0, 0, 0, 0, 0, -1), 1), [0, 2, 3, 4, 5, 6, 7], training=False)
+    assert len(agent.Q) == before
+
+
+def test_symmetric_lookup_and_folding():
+    agent = make_agent()
+    board, player = ((1, -1, 0, 0, 0, 0, 0, 0, 0), 1)
+    table, stats = compact_table(agent.Q, fold_symmetries=True)
+    assert stats["states_out"] == 2
+    folded = QLearningAgent()
+    folded.Q.update(table)
+    folded.folded = True
+    for perm in SYMMETRIES:
+        variant = transform_board(board, perm)
+        row = folded.q_values((variant, player))
+        # action a of the stored board is action perm.index(a) of the variant
+        assert {perm.index(a): q for a, q in agent.Q[(board, player)].items()} == row
+    assert agent.policy_flips(folded) == 0
+    canonical, _ = canonical_state((board, player))
+    assert canonical in table
+
+    # unfolded tables never read a symmetric variant
+    rotated = transform_board(board, SYMMETRIES[1])
+    assert rotated != board and agent.q_values((rotated, player)) == {}
+
+
+def test_folded_table_updates_canonical_row():
+    table, _ = compact_table(make_agent().Q, fold_symmetries=True)
+    agent = QLearningAgent(alpha=0.5)
+    agent.Q.update(table)
+    agent.folded = True
+    state = ((1, -1, 0, 0, 0, 0, 0, 0, 0), 1)
+    canonical, _ = canonical_state(state)
+    assert canonical != state
+
+    agent.update(state, 2, 1.0, state, [], True)
+    # the update starts from the folded value and writes the folded row, no raw-key row
+    assert state not in agent.Q and len(agent.Q) == 2
+    assert agent.q_values(state) == {2: 0.875, 8: -0.5}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, save in (("table.pkl", agent.save), ("table.int8", agent.save_quantized)):
+            path = os.path.join(tmp, name)
+            save(path)
+            loaded = QLearningAgent()
+            loaded.load(path)
+            assert loaded.folded and loaded.q_values(state)[2] == pytest.approx(0.875, abs=1e-2)
+
+
+def test_book_roundtrip_and_lookup_first():
+    book = Book.build()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.ttb")
+        book.save(path)
+        loaded = Book.load(path)
+    assert list(loaded.codes) == list(book.codes) and list(loaded.masks) == list(book.masks)
+
+    # O wins at 2; the Q-table prefers 5, the book overrides it
+    board = (-1, -1, 0, 1, 1, 0, 0, 0, 1)
+    agent = make_agent()
+    agent.Q[(board, -1)][5] = 1.0
+    agent.book = loaded
+    legal = [a for a, v in enumerate(board) if v == 0]
+    assert agent.get_action((board, -1), legal, training=False) == 2 == best_actions(board, -1)[0]
+    assert loaded.hits == 1
+
+    # middlegame positions are not covered and fall back to the Q-table
+    middlegame = ((1, -1, 0, 0, 1, 0, 0, 0, -1), 1)
+    agent.Q[middlegame][7] = 0.5
+    assert agent.get_action(middlegame, [2, 3, 5, 6, 7], training=False) == 7
+    assert loaded.hits == 1 and loaded.lookups == 2
+
+
+def test_qlambda_propagates_terminal_reward():
+    states = [((0,) * 8 + (i,), 1) for i in range(3)]
+    plain, traced = QLearningAgent(gamma=1.0), QLambdaAgent(gamma=1.0, lam=1.0)
+    for agent in (plain, traced):
+        agent.start_episode()
+        agent.update(states[0], 0, 0, states[1], [1], False)
+        agent.update(states[1], 1, 0, states[2], [2], False)
+        agent.update(states[2], 2, 1, states[2], [], True)
+    # one episode: one-step Q-learning only moves the last pair, Q(lambda) all of them
+    assert plain.Q[states[0]][0] == 0.0
+    assert traced.Q[states[0]][0] == traced.Q[states[2]][2] == 0.5
+    assert not traced.traces
+
+
+def test_afterstate_sharing_and_load_agent():
+    agent = AfterstateAgent(epsilon=0.0)
+    # X at 0 then 4, or X at 4 then 0: both moves lead to the same board
+    first = ((1, -1, 0, 0, 0, 0, 0, 0, 0), 1)
+    second = ((0, -1, 0, 0, 1, 0, 0, 0, 0), 1)
+    agent.update(first, 4, 1, first, [], True)
+    assert agent.q_values(second)[0] == agent.q_values(first)[4] == 0.5
+    assert agent.get_action(second, [0, 2, 3, 5, 6, 7, 8], training=False) == 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for saved in (agent, make_agent()):
+            path = os.path.join(tmp, "table.pkl")
+            saved.save(path)
+            loaded = load_agent(path)
+            assert type(loaded) is type(saved)
+            assert loaded.table_size() == saved.table_size()
+
+
+def test_visit_counts_schedule_and_save():
+    agent = QLearningAgent(alpha_schedule="visits", omega=1.0)
+    state = ((0,) * 9, 1)
+    for reward in (1.0, 0.0, 0.5):
+        agent.update(state, 4, reward, state, [], True)
+    # alpha = 1/n turns the value into the running mean of the targets
+    assert abs(agent.Q[state][4] - 0.5) < 1e-12
+    assert agent.counts.get(state, 4) == 3 and agent.counts.row(state) == {4: 3}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.pkl")
+        agent.save(path)
+        loaded = QLearningAgent()
+        loaded.load(path)
+        assert loaded.counts.row(state) == {4: 3}
+        # readers that only know the plain format still get the table
+        with open(path, "rb") as f:
+            assert pickle.load(f) == {state: {4: agent.Q[state][4]}}
+
+
+def test_afterstate_visit_counts_shared_between_move_orders():
+    agent = AfterstateAgent(alpha_schedule="visits", omega=1.0)
+    # X at 0 then 4, or at 4 then 0: both orders reach the same board after X's move
+    first = ((1, -1, 0, 0, 0, 0, 0, 0, 0), 1)
+    second = ((0, -1, 0, 0, 1, 0, 0, 0, 0), 1)
+    agent.update(first, 4, 1.0, first, [], True)
+    agent.update(second, 0, 0.0, second, [], True)
+    # alpha = 1/n over the shared afterstate averages the two targets
+    after = agent.afterstate(first, 4)
+    assert after == agent.afterstate(second, 0) and agent.V[after] == 0.5
+    assert agent.visit_count(first, 4) == agent.visit_count(second, 0) == 2
+
+
+def test_value_network_learns_and_roundtrips():
+    pytest.importorskip("numpy")
+    from value_agent import ValueNetworkAgent
+
+    agent = ValueNetworkAgent(alpha=0.5, epsilon=0.0, hidden=8, batch_size=4, seed=0)
+    # X completes the top row with 2; any other move loses the chance
+    state = ((1, 1, 0, -1, -1, 0, 0, 0, 0), 1)
+    for _ in range(200):
+        agent.update(state, 2, 1, state, [], True)
+        agent.update(state, 5, -1, state, [], True)
+    assert agent.get_action(state, [2, 5, 6, 7, 8], training=False) == 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "value.pkl")
+        agent.save(path)
+        loaded = load_agent(path)
+    assert isinstance(loaded, ValueNetworkAgent)
+    assert loaded.q_values(state) == pytest.approx(agent.q_values(state))
+
+
+def test_online_learning_log_and_compaction():
+    from gamerecord import iter_games
+    from online import OnlineLearner
+
+    win = (0, 3, 1, 4, 2)  # X takes the top row
+    last = (((1, 1, 0, -1, -1, 0, 0, 0, 0), 1), 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "qtable.pkl")
+        make_agent().save(path)
+        agent = load_agent(path)
+        before = agent.Q
+        learner = OnlineLearner(agent, path, alpha=0.5, max_log_games=2)
+        learner.submit(win, 1)
+        learner.close()
+        # the learned table replaced the live one instead of changing it in place
+        assert agent.Q is not before and last[0] not in before
+        assert agent.Q[last[0]][last[1]] == 0.5
+        assert [g.moves for g in iter_games(learner.log_path)] == [win]
+
+        # a restart replays the log onto the saved model
+        restarted = load_agent(path)
+        learner = OnlineLearner(restarted, path, alpha=0.5, max_log_games=2)
+        assert learner.replayed == 1 and restarted.Q[last[0]][last[1]] == 0.5
+        learner.submit(win, 1)
+        learner.close()
+        # the second logged game folded the log into the model
+        assert learner.compactions == 1 and list(iter_games(learner.log_path)) == []
+        assert load_agent(path).Q[last[0]][last[1]] == 0.75
+
+
+def test_stream_pickle_matches_pickle_load():
+    table = {((0,) * 9, 1): {}}
+    for i in range(1500):  # more rows than one SETITEMS batch
+        board = tuple(i // 3 ** c % 3 - 1 for c in range(9))
+        table[(board, 1 if i % 2 else -1)] = {a: (i - a) / 7 for a in range(i % 4)}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.pkl")
+        for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+            with open(path, "wb") as f:
+                pickle.dump(table, f, protocol=protocol)
+            with open(path, "rb") as f:
+                streamed = list(_stream_pickle(f))
+            with open(path, "rb") as f:
+                assert streamed == list(pickle.load(f).items())
+
+        # a shared row the streamer cannot handle: fall back while nothing was yielded ...
+        rows = list(table)
+        shared = dict(table)
+        shared[rows[6]] = shared[rows[5]]
+        with open(path, "wb") as f:
+            pickle.dump(shared, f)
+        assert list(iter_qtable(path)) == list(shared.items())
+        # ... and fail instead of repeating rows once some were yielded
+        shared = dict(table)
+        shared[rows[-1]] = shared[rows[5]]
+        with open(path, "wb") as f:
+            pickle.dump(shared, f)
+        with pytest.raises(ValueError):
+            list(iter_qtable(path))
+
+
+def test_iter_qtable_reads_quantized_tables():
+    agent = QLearningAgent()
+    agent.Q[((0,) * 9, 1)].update({0: 0.5, 4: -0.25})
+    agent.Q[((1, 0, 0, 0, -1, 0, 0, 0, 0), 1)].update({2: 1.0})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.int8")
+        agent.save_quantized(path, "int8")
+        loaded = QLearningAgent()
+        loaded.load(path)
+        streamed = dict(iter_qtable(path))
+    assert streamed == {s: dict(row) for s, row in loaded.Q.items()}
+
+
+def test_read_table_show_maps_folded_rows(capsys):
+    agent = make_agent()
+    table, _ = compact_table(agent.Q, fold_symmetries=True)
+    folded = QLearningAgent()
+    folded.Q.update(table)
+    folded.folded = True
+    board, player = ((1, -1, 0, 0, 0, 0, 0, 0, 0), 1)
+    variant = transform_board(board, SYMMETRIES[3])
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, save in (("folded.pkl", folded.save), ("folded.int8", folded.save_quantized)):
+            path = os.path.join(tmp, name)
+            save(path)
+            assert table_folded(path)
+            show_board(path, variant, player)
+            out = capsys.readouterr().out
+            assert "folded table" in out
+            expected = folded.q_values((variant, player))
+            assert expected and canonical_state((variant, player))[0] != (variant, player)
+            if name.endswith(".int8"):
+                loaded = QLearningAgent()
+                loaded.load(path)
+                expected = loaded.q_values((variant, player))
+            assert format_grid(variant, expected) in out
+        path = os.path.join(tmp, "plain.pkl")
+        agent.save(path)
+        assert not table_folded(path)
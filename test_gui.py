@@ -7,6 +7,7 @@ from game import TicTacToe
 from agent import QLearningAgent
 from utils import make_state_key
 import os
+import time
 
 
 def test_gui_game_logic():
@@ -116,6 +117,65 @@ def test_gui_components():
             return False
 
 
+def test_gui_headless_latency():
+    """Drive the GUI controller headlessly and check every game finishes."""
+    print("\nTesting headless GUI code path...")
+    
+    from gui_stress import run_stress
+    stats = run_stress("qtable.pkl", games=20)
+    
+    finished = sum(stats["results"].values())
+    print(f"✓ Played {finished} games, {stats['agent_moves']} agent moves")
+    print(f"  Agent response p95: {stats['response_ms'][95]:.3f} ms")
+    assert finished == 20
+    assert stats["agent_moves"] > 0
+    return True
+
+
+def test_session_manager():
+    """Serve several games from one shared agent, the way sessions.py does."""
+    print("\nTesting session manager...")
+    
+    from sessions import SessionManager
+    agent = QLearningAgent(epsilon=0.0)
+    agent.load("qtable.pkl")
+    table_size = len(agent.Q)
+    manager = SessionManager(agent, idle_timeout=60.0)
+    
+    games = [manager.create(agent_starts=(i % 2 == 0)) for i in range(4)]
+    assert len(manager) == 4
+    assert len(games[0]["moves"]) == 1 and games[1]["moves"] == []
+    
+    # the human always takes the lowest free cell until the game ends
+    for game in games:
+        state = game
+        while not state["done"]:
+            state = manager.move(state["id"], state["board"].index(0))
+        assert state["winner"] in (1, -1, 0)
+        assert manager.query(state["id"]) == state
+        try:
+            manager.move(state["id"], 0)
+            assert False, "move accepted after the game ended"
+        except RuntimeError:
+            pass
+    print(f"✓ Finished {len(games)} games, winners {[manager.query(g['id'])['winner'] for g in games]}")
+    
+    fresh = manager.create(agent_starts=True)
+    try:
+        manager.move(fresh["id"], fresh["moves"][0])
+        assert False, "occupied cell accepted"
+    except ValueError:
+        pass
+    assert manager.close(fresh["id"])["id"] == fresh["id"]
+    
+    # idle sessions are evicted, and lookups never grew the shared table
+    assert manager.evict_idle(now=time.monotonic() + 120.0) == 4
+    assert len(manager) == 0
+    assert len(agent.Q) == table_size
+    print("✓ Illegal moves rejected, idle sessions evicted, table unchanged")
+    return True
+
+
 def main():
     """Run all GUI tests."""
     print("=" * 60)
@@ -124,14 +184,18 @@ def main():
     
     test1_passed = test_gui_game_logic()
     test2_passed = test_gui_components()
+    test3_passed = test_gui_headless_latency()
+    test4_passed = test_session_manager()
     
     print("\n" + "=" * 60)
     print("Test Summary")
     print("=" * 60)
     print(f"Game Logic Test: {'✓ PASSED' if test1_passed else '✗ FAILED'}")
     print(f"GUI Components Test: {'✓ PASSED' if test2_passed else '✗ FAILED'}")
+    print(f"Headless Latency Test: {'✓ PASSED' if test3_passed else '✗ FAILED'}")
+    print(f"Session Manager Test: {'✓ PASSED' if test4_passed else '✗ FAILED'}")
     
-    if test1_passed and test2_passed:
+    if test1_passed and test2_passed and test3_passed and test4_passed:
         print("\n✓ All tests passed!")
         print("\nTo run the GUI with a display:")
         print("  python gui.py")
@@ -0,0 +1,138 @@
+"""
+Tests for the training and evaluation tools: tournament ratings, sweep resume,
+game records and background snapshot evaluation.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+
+import pytest
+
+import background_eval
+from agent import QLearningAgent
+from background_eval import BackgroundEvaluator
+from gamerecord import GameRecord, GameRecordWriter, iter_games
+from sweep import grid_configs, open_db, sweep
+from tournament import bradley_terry, run_tournament
+from train import side_paths, train
+
+
+def test_bradley_terry_orders_players():
+    names = ["strong", "middle", "weak", "twin"]
+    # points[i][j]: score of i against j over 100 games; "twin" plays exactly like "middle"
+    points = [[0, 70, 90, 70],
+              [30, 0, 70, 50],
+              [10, 30, 0, 30],
+              [30, 50, 70, 0]]
+    played = [[0 if i == j else 100 for j in range(4)] for i in range(4)]
+    ratings = bradley_terry(names, points, played)
+    assert ratings["strong"] > ratings["middle"] > ratings["weak"]
+    assert abs(ratings["middle"] - ratings["twin"]) < 1e-6
+    # strengths are normalised to a geometric mean of 1, i.e. a mean rating of 1500
+    assert abs(sum(ratings.values()) / 4 - 1500) < 1e-6
+
+
+def test_tournament_reuses_cached_matches(capsys):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, "cache.json")
+        first = run_tournament(["random", "solver"], games=10, workers=1, cache_path=cache)
+        assert first[0]["player"] == "solver"
+        second = run_tournament(["random", "solver"], games=10, workers=1, cache_path=cache)
+    assert "2 matches, 2 cached, 0 to play" in capsys.readouterr().out
+    assert second == first
+
+
+def test_sweep_resumes_from_database(capsys):
+    configs = grid_configs({"alpha": [0.3, 0.5], "gamma": [0.99], "epsilon_decay": [0.99],
+                            "min_epsilon": [0.1], "episodes": [40]})
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "sweep.db")
+        first = sweep(configs, rungs=2, eta=2, workers=1, eval_games=10, db_path=db)
+        capsys.readouterr()
+
+        # a finished sweep schedules nothing and returns the stored results
+        assert sweep(configs, rungs=2, eta=2, workers=1, eval_games=10, db_path=db) == first
+        out = capsys.readouterr().out
+        assert "Rung 1/2: 2 configs, 2 finished, 0 to run" in out
+        assert "Rung 2/2: 1 configs, 1 finished, 0 to run" in out
+
+        # an interrupted sweep re-runs only the missing trial
+        conn = open_db(db)
+        conn.execute("DELETE FROM trials WHERE budget = 40")
+        conn.commit()
+        conn.close()
+        sweep(configs, rungs=2, eta=2, workers=1, eval_games=10, db_path=db)
+        assert "Rung 2/2: 1 configs, 0 finished, 1 to run" in capsys.readouterr().out
+
+
+def test_game_record_roundtrip_and_truncation():
+    games = [GameRecord(tuple(range(n)), winner, source)
+             for n, winner, source in ((0, None, "train"), (5, 1, "gui"), (6, -1, "human"), (9, 0, "play"))]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "games.ttt")
+        for batch in (games[:2], games[2:]):  # the second writer appends
+            with GameRecordWriter(path) as writer:
+                for game in batch:
+                    writer.write(game.moves, game.winner, game.source)
+        assert list(iter_games(path)) == games
+
+        # a record cut off by an interrupted write is an error, not a shorter game
+        with open(path, "rb+") as f:
+            f.truncate(os.path.getsize(path) - 1)
+        with pytest.raises(ValueError):
+            list(iter_games(path))
+
+        other = os.path.join(tmp, "notes.txt")
+        with open(other, "w") as f:
+            f.write("not a game record")
+        with pytest.raises(ValueError):
+            GameRecordWriter(other)
+
+
+def fake_snapshot(episode, agent_X, agent_O, games, perfect, best_paths, best_score, results):
+    # the "agent" is the snapshot's score; report the best score the child started from
+    results.put((episode, {"score": agent_X, "started_from": best_score}, agent_X > best_score, 0.0))
+
+
+def test_background_best_score_never_drops(monkeypatch):
+    monkeypatch.setattr(background_eval, "evaluate_snapshot", fake_snapshot)
+    evaluator = BackgroundEvaluator(every=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        evaluator.submit(1, 0.8, None)
+        evaluator.process.join()
+        # the finished child's result is collected before the next fork
+        evaluator.submit(2, 0.5, None)
+        evaluator.close()
+        assert evaluator.history[1][1]["started_from"] == 0.8
+        # results claiming an improvement that is none are not taken as the best
+        evaluator.report(3, {"score": 0.6}, True, 0.0)
+    assert (evaluator.best_episode, evaluator.best_score) == (1, 0.8)
+
+
+def test_background_vs_best_without_keep_best():
+    evaluator = BackgroundEvaluator(every=100, games=10)
+    agent = QLearningAgent(epsilon=0.0)
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        evaluator.submit(100, agent, agent)
+        evaluator.process.join()
+        evaluator.submit(200, agent, agent)
+        evaluator.close()
+    assert "vs_best" not in evaluator.history[0][1]
+    assert "vs_best" in evaluator.history[1][1]
+    assert "saved to" not in out.getvalue()
+    assert not os.path.exists(os.path.dirname(evaluator.best_paths[0]))
+
+
+def test_background_evaluation_keeps_best_tables():
+    with tempfile.TemporaryDirectory() as tmp:
+        best_paths = side_paths(os.path.join(tmp, "best.pkl"))
+        evaluator = BackgroundEvaluator(every=100, games=20, best_paths=best_paths)
+        with contextlib.redirect_stdout(io.StringIO()):
+            train(episodes=300, save_path=None, use_csv_data=False, log_every=0, evaluator=evaluator)
+        # snapshots due while an evaluation is still running are skipped
+        episodes = [episode for episode, _ in evaluator.history]
+        assert episodes[0] == 100 and len(episodes) + evaluator.skipped == 3
+        assert evaluator.best_episode is not None
+        assert all(os.path.exists(path) for path in best_paths)
@@ -0,0 +1,175 @@
+"""
+Round-robin tournament between Q-table snapshots and built-in players.
+
+Every pairing is played with both colours across a process pool. Match results
+are cached by the content hash of the tables involved, so re-running after adding
+one snapshot only plays that snapshot's new games.
+"""
+
+import glob
+import hashlib
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import permutations
+from typing import Dict, List
+
+from evaluate import evaluate
+from players import BUILTIN_PLAYERS, load_player
+
+CACHE_FILE = "tournament_cache.json"
+GAMES_PER_MATCH = 100
+
+# Players loaded in this (worker) process, keyed by spec
+_loaded_players = {}
+
+
+def player_id(spec: str) -> str:
+    """Stable identity of a player: content hash for tables, name for built-ins."""
+    if spec in BUILTIN_PLAYERS:
+        return "builtin:" + spec
+    h = hashlib.sha256()
+    with open(spec, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def match_key(id_x: str, id_o: str, games: int) -> str:
+    return f"{id_x}|{id_o}|{games}"
+
+
+def play_match(spec_x: str, spec_o: str, games: int, seed: int) -> Dict[str, int]:
+    """Play `games` games with spec_x as X and spec_o as O (runs in a worker)."""
+    for spec in (spec_x, spec_o):
+        if spec not in _loaded_players:
+            _loaded_players[spec] = load_player(spec)
+    random.seed(seed)
+    return evaluate(_loaded_players[spec_x], _loaded_players[spec_o], games, verbose=False)
+
+
+def load_cache(path: str) -> Dict[str, Dict[str, int]]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_cache(path: str, cache: Dict[str, Dict[str, int]]):
+    if not path:
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def bradley_terry(names: List[str], points, played, iterations=1000, tol=1e-9) -> Dict[str, float]:
+    """
+    Fit Bradley-Terry strengths with the MM algorithm and return them on the Elo scale.
+
+    points[i][j] is the score of i against j (win = 1, draw = 0.5), played[i][j]
+    the number of games between them. Each pairing gets one virtual draw so that
+    players without any points still receive a finite rating.
+    """
+    n = len(names)
+    w = [[points[i][j] + (0.5 if played[i][j] else 0.0) for j in range(n)] for i in range(n)]
+    g = [[played[i][j] + (1 if played[i][j] else 0) for j in range(n)] for i in range(n)]
+    strength = [1.0] * n
+
+    for _ in range(iterations):
+        new = []
+        for i in range(n):
+            wins = sum(w[i])
+            denom = sum(g[i][j] / (strength[i] + strength[j]) for j in range(n) if g[i][j])
+            new.append(wins / denom if denom else strength[i])
+        # normalise to geometric mean 1
+        log_mean = sum(math.log(s) for s in new) / n
+        new = [s / math.exp(log_mean) for s in new]
+        delta = max(abs(a - b) for a, b in zip(new, strength))
+        strength = new
+        if delta < tol:
+            break
+
+    return {names[i]: 1500 + 400 * math.log10(strength[i]) for i in range(n)}
+
+
+def run_tournament(specs: List[str], games=GAMES_PER_MATCH, workers=None, cache_path=CACHE_FILE):
+    """
+    Play every ordered pairing of `specs` and return one standings row per player,
+    sorted by rating.
+    """
+    ids = {spec: player_id(spec) for spec in specs}
+    cache = load_cache(cache_path)
+
+    pairings = list(permutations(specs, 2))
+    todo = [(x, o) for x, o in pairings if match_key(ids[x], ids[o], games) not in cache]
+    print(f"{len(pairings)} matches, {len(pairings) - len(todo)} cached, {len(todo)} to play")
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for x, o in todo:
+                key = match_key(ids[x], ids[o], games)
+                seed = int(hashlib.sha256(key.encode()).hexdigest()[:8], 16)
+                futures[pool.submit(play_match, x, o, games, seed)] = key
+            for done, future in enumerate(as_completed(futures), 1):
+                cache[futures[future]] = future.result()
+                # persist after every match so an interrupted run keeps its progress
+                save_cache(cache_path, cache)
+                print(f"  played {done}/{len(todo)}")
+
+    index = {spec: i for i, spec in enumerate(specs)}
+    n = len(specs)
+    points = [[0.0] * n for _ in range(n)]
+    played = [[0] * n for _ in range(n)]
+    record = {spec: {"win": 0, "draw": 0, "lose": 0} for spec in specs}
+
+    for x, o in pairings:
+        res = cache[match_key(ids[x], ids[o], games)]
+        i, j = index[x], index[o]
+        total = res["win"] + res["draw"] + res["lose"]
+        points[i][j] += res["win"] + 0.5 * res["draw"]
+        points[j][i] += res["lose"] + 0.5 * res["draw"]
+        played[i][j] += total
+        played[j][i] += total
+        record[x]["win"] += res["win"]
+        record[x]["draw"] += res["draw"]
+        record[x]["lose"] += res["lose"]
+        record[o]["win"] += res["lose"]
+        record[o]["draw"] += res["draw"]
+        record[o]["lose"] += res["win"]
+
+    ratings = bradley_terry(specs, points, played)
+    standings = [dict(player=spec, rating=ratings[spec], **record[spec]) for spec in specs]
+    standings.sort(key=lambda row: row["rating"], reverse=True)
+    return standings
+
+
+def print_standings(standings):
+    print(f"\n{'#':>3}  {'Player':<30} {'Rating':>7} {'W':>7} {'D':>7} {'L':>7}")
+    for rank, row in enumerate(standings, 1):
+        name = row["player"] if row["player"] in BUILTIN_PLAYERS else os.path.basename(row["player"])
+        print(f"{rank:>3}  {name:<30} {row['rating']:>7.0f} {row['win']:>7} {row['draw']:>7} {row['lose']:>7}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Round-robin tournament between Q-table snapshots')
+    parser.add_argument('directory', nargs='?', default='.', help='Directory containing Q-table files')
+    parser.add_argument('--pattern', type=str, default='*.pkl', help='Glob pattern for Q-table files')
+    parser.add_argument('--players', nargs='*', default=[], choices=BUILTIN_PLAYERS, help='Built-in players to include')
+    parser.add_argument('--games', type=int, default=GAMES_PER_MATCH, help='Games per pairing and colour')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--cache', type=str, default=CACHE_FILE, help='Match result cache file ("" to disable)')
+
+    args = parser.parse_args()
+
+    specs = sorted(glob.glob(os.path.join(args.directory, args.pattern))) + list(args.players)
+    if len(specs) < 2:
+        parser.error("need at least two players")
+
+    print_standings(run_tournament(specs, args.games, args.workers, args.cache))
@@ -1,8 +1,11 @@
 from game import TicTacToe
-from agent import QLearningAgent
+from agent import QLearningAgent, AGENT_TYPES, ALPHA_SCHEDULES, make_agent
 from data_loader import load_tictactoe_data
+from gamerecord import GameRecordWriter
 from utils import make_state_key
+import os
 import random
+import time
 
 EPSILON_DECAY = 0.99995
 MIN_EPSILON = 0.05
@@ -55,6 +58,7 @@ def pretrain_with_csv_data(agent: QLearningAgent, data_file="tic-tac-toe.data",
         legal = env.legal_actions()
         
         if legal and not env.done:
+            agent.start_episode()
             # Let agent learn from this state
             state_key = make_state_key(tuple(env.board), env.current_player)
             action = agent.get_action(state_key, legal, training=True)
@@ -82,12 +86,87 @@ def pretrain_with_csv_data(agent: QLearningAgent, data_file="tic-tac-toe.data",
     print(f"Pre-training completed with {len(data)} unique game states.\n")
 
 
-def train(episodes=EPISODES, save_path="qtable.pkl", use_csv_data=True, csv_data_file="tic-tac-toe.data"):
+def run_game(env: TicTacToe, players, learners, moves=None):
+    """
+    Play one game between players[1] (X) and players[-1] (O), or replay it from its
+    move sequence `moves`. Every player id in `learners` receives Q-updates from its
+    own perspective: the next state of a move is the position after the opponent's
+    reply, as in train(). When the moves are chosen by the players, learners explore.
+    Returns the winner (1, -1 or 0), or None if `moves` ends before the game does.
+    """
+    board = env.reset()
+    pending = {}
+    scripted = None if moves is None else iter(moves)
+    while not env.done:
+        player = env.current_player
+        if scripted is not None:
+            action = next(scripted, None)
+            if action is None:
+                return None
+        state_key = make_state_key(board, player)
+        legal = env.legal_actions()
+        learning = player in learners
+        if learning and player in pending:
+            prev_state, prev_action = pending[player]
+            players[player].update(prev_state, prev_action, 0, state_key, legal, False)
+        if scripted is None:
+            action = players[player].get_action(state_key, legal, training=learning)
+        board, _, _, _ = env.step(action)
+        pending[player] = (state_key, action)
+
+    for player in learners:
+        if player in pending:
+            reward = 0 if env.winner == 0 else (1 if env.winner == player else -1)
+            prev_state, prev_action = pending[player]
+            players[player].update(prev_state, prev_action, reward, make_state_key(board, player), [], True)
+    return env.winner
+
+
+def replay_game(env: TicTacToe, agents, moves, learners=(1, -1)):
+    """
+    Apply the Q-updates of an already played game, given as its move sequence.
+    agents maps player id (1 = X, -1 = O) to the agent learning that side.
+    """
+    return run_game(env, agents, learners, moves)
+
+
+def agent_options(args):
+    """Constructor options of the agent selected on the command line."""
+    if args.agent == "value":
+        return {"hidden": args.hidden, "batch_size": args.batch_size, "replay_size": args.replay_size}
+    options = {"alpha_schedule": args.alpha_schedule, "omega": args.omega,
+               "exploration_bonus": args.exploration_bonus, "count_visits": args.count_visits}
+    if args.agent == "qlambda":
+        options["lam"] = args.lam
+    return options
+
+
+def side_paths(save_path):
+    """Paths of the X and O tables derived from a base path (qtable.pkl -> qtable_X.pkl, qtable_O.pkl)."""
+    base, ext = os.path.splitext(save_path)
+    return f"{base}_X{ext}", f"{base}_O{ext}"
+
+
+def train(episodes=EPISODES, save_path="qtable.pkl", use_csv_data=True, csv_data_file="tic-tac-toe.data",
+          alpha=0.5, gamma=0.99, epsilon_decay=EPSILON_DECAY, min_epsilon=MIN_EPSILON, log_every=5000,
+          run=None, metrics_every=1000, record_path=None, agent_type="q", agent_options=None, callback=None,
+          evaluator=None):
+    """
+    Self-play training of an X and an O agent.
+    agent_type selects the learner (see agent.AGENT_TYPES); agent_options are passed
+    to its constructor. If `run` (a runlog.Run) is given, throughput, epsilon, mean
+    |TD error| and table sizes are recorded every `metrics_every` episodes. If
+    `record_path` is given, every game is appended to that game record file.
+    `callback(episodes_done, agent_X, agent_O)` is called every `metrics_every`
+    episodes; training stops early when it returns True. An `evaluator`
+    (background_eval.BackgroundEvaluator) scores snapshots in background processes.
+    """
     env = TicTacToe()
+    recorder = GameRecordWriter(record_path, "train") if record_path else None
 
     # zwei Agents – einer spielt X, einer O
-    agent_X = QLearningAgent(epsilon=1.0)
-    agent_O = QLearningAgent(epsilon=1.0)
+    agent_X = make_agent(agent_type, alpha=alpha, gamma=gamma, epsilon=1.0, **(agent_options or {}))
+    agent_O = make_agent(agent_type, alpha=alpha, gamma=gamma, epsilon=1.0, **(agent_options or {}))
 
     # Pretrain für beide Spieler
     if use_csv_data:
@@ -96,9 +175,14 @@ def train(episodes=EPISODES, save_path="qtable.pkl", use_csv_data=True, csv_data
 
     print(f"=== Starting main RL training (AI vs AI) ===")
 
+    td_sum, td_count = 0.0, 0
+    interval_start = time.time()
+
     for ep in range(episodes):
         board = env.reset()
         done = False
+        agent_X.start_episode()
+        agent_O.start_episode()
 
         while not done:
             # Agent auswählen je nach Spieler
@@ -114,7 +198,8 @@ def train(episodes=EPISODES, save_path="qtable.pkl", use_csv_data=True, csv_data
             # Endzustand nach eigenem Zug
             if done:
                 next_state_key = make_state_key(next_board, env.current_player)
-                current_agent.update(state_key, action, reward, next_state_key, [], True)
+                td_sum += abs(current_agent.update(state_key, action, reward, next_state_key, [], True))
+                td_count += 1
                 board = next_board
                 break
 
@@ -143,28 +228,58 @@ def train(episodes=EPISODES, save_path="qtable.pkl", use_csv_data=True, csv_data
                 next_state_key_X = make_state_key(after_opp_board, 1)
                 next_state_key_O = make_state_key(after_opp_board, -1)
 
-                agent_X.update(state_key, action, agent_X_reward, next_state_key_X, [], True)
-                agent_O.update(opp_state_key, opp_action, agent_O_reward, next_state_key_O, [], True)
+                td_sum += abs(agent_X.update(state_key, action, agent_X_reward, next_state_key_X, [], True))
+                td_sum += abs(agent_O.update(opp_state_key, opp_action, agent_O_reward, next_state_key_O, [], True))
 
             else:
                 next_state_key = make_state_key(after_opp_board, env.current_player)
 
                 # partieller Reward
-                current_agent.update(state_key, action, 0, next_state_key, env.legal_actions(), False)
-                other_agent.update(opp_state_key, opp_action, 0, next_state_key, env.legal_actions(), False)
+                td_sum += abs(current_agent.update(state_key, action, 0, next_state_key, env.legal_actions(), False))
+                td_sum += abs(other_agent.update(opp_state_key, opp_action, 0, next_state_key, env.legal_actions(), False))
 
+            td_count += 2
             board = after_opp_board
 
+        if recorder:
+            recorder.write(env.history, env.winner)
+
         # Epsilon-Decay für BEIDE Agents
-        agent_X.epsilon = max(MIN_EPSILON, agent_X.epsilon * EPSILON_DECAY)
-        agent_O.epsilon = max(MIN_EPSILON, agent_O.epsilon * EPSILON_DECAY)
+        agent_X.epsilon = max(min_epsilon, agent_X.epsilon * epsilon_decay)
+        agent_O.epsilon = max(min_epsilon, agent_O.epsilon * epsilon_decay)
 
-        if ep % 5000 == 0:
+        if log_every and ep % log_every == 0:
             print(f"Episode {ep}/{episodes} | eps X={agent_X.epsilon:.3f} | eps O={agent_O.epsilon:.3f}")
 
-    # Am Ende: beide Q-Tables speichern
-    agent_X.save("qtable_X.pkl")
-    agent_O.save("qtable_O.pkl")
+        if run is not None and (ep + 1) % metrics_every == 0:
+            now = time.time()
+            run.log_metrics(ep + 1, {
+                "episodes_per_sec": metrics_every / max(now - interval_start, 1e-9),
+                "epsilon": agent_X.epsilon,
+                "td_error": td_sum / max(td_count, 1),
+                "table_size_X": agent_X.table_size(),
+                "table_size_O": agent_O.table_size(),
+            })
+            td_sum, td_count = 0.0, 0
+            interval_start = now
+
+        if evaluator is not None:
+            evaluator.step(ep + 1, agent_X, agent_O)
+
+        if callback is not None and (ep + 1) % metrics_every == 0 and callback(ep + 1, agent_X, agent_O):
+            print(f"Stopped after {ep + 1} episodes.")
+            break
+
+    if recorder:
+        recorder.close()
+    if evaluator is not None:
+        evaluator.close()
+
+    # Am Ende: beide Q-Tables speichern (save_path=None überspringt das Speichern)
+    if save_path:
+        path_X, path_O = side_paths(save_path)
+        agent_X.save(path_X)
+        agent_O.save(path_O)
 
     print("Training completed (AI vs AI).")
     return agent_X, agent_O
@@ -172,13 +287,66 @@ def train(episodes=EPISODES, save_path="qtable.pkl", use_csv_data=True, csv_data
 
 if __name__ == "__main__":
     import argparse
+    from profiling import add_profile_argument, profiled
     
     parser = argparse.ArgumentParser(description='Train TicTacToe RL agent')
     parser.add_argument('--episodes', type=int, default=EPISODES, help='Number of training episodes')
     parser.add_argument('--no-csv', action='store_true', help='Skip CSV pre-training')
     parser.add_argument('--csv-file', type=str, default='tic-tac-toe.data', help='Path to CSV data file')
-    parser.add_argument('--output', type=str, default='qtable.pkl', help='Output path for trained model')
-    
+    parser.add_argument('--output', type=str, default='qtable.pkl', help='Base output path (X/O tables get _X/_O suffixes)')
+    parser.add_argument('--alpha', type=float, default=None, help='Learning rate (default 0.5, value network 0.1)')
+    parser.add_argument('--gamma', type=float, default=0.99, help='Discount factor')
+    parser.add_argument('--epsilon-decay', type=float, default=EPSILON_DECAY, help='Per-episode epsilon decay')
+    parser.add_argument('--min-epsilon', type=float, default=MIN_EPSILON, help='Epsilon floor')
+    parser.add_argument('--agent', choices=list(AGENT_TYPES), default='q', help='Learner: one-step Q-learning, Watkins Q(lambda), afterstate values or a NumPy value network')
+    parser.add_argument('--lam', type=float, default=0.8, help='Trace decay lambda (qlambda agent)')
+    parser.add_argument('--alpha-schedule', choices=ALPHA_SCHEDULES, default='constant',
+                        help='constant alpha, or alpha = 1/n^omega for the n-th visit of an entry')
+    parser.add_argument('--omega', type=float, default=0.7, help='Exponent of the visits alpha schedule')
+    parser.add_argument('--exploration-bonus', type=float, default=0.0,
+                        help='Count-based exploration bonus c / sqrt(n + 1) added to Q-values while training')
+    parser.add_argument('--count-visits', action='store_true', help='Keep and save visit counts with a constant alpha')
+    parser.add_argument('--hidden', type=int, default=64, help='Hidden units of the value network (0 = linear model)')
+    parser.add_argument('--batch-size', type=int, default=32, help='Mini-batch size of the value network')
+    parser.add_argument('--replay-size', type=int, default=20000, help='Replay buffer size of the value network')
+    parser.add_argument('--record-games', type=str, default=None, help='Append every training game to this game record file')
+    parser.add_argument('--eval-every', type=int, default=0, help='Evaluate a snapshot in the background every N episodes')
+    parser.add_argument('--eval-games', type=int, default=200, help='Games per background evaluation match')
+    parser.add_argument('--eval-perfect', action='store_true', help='Also evaluate snapshots against the perfect player')
+    parser.add_argument('--keep-best', action='store_true', help='Save the best evaluated snapshot as <output>_best_X/_O')
+    parser.add_argument('--runs-db', type=str, default='runs.db', help='Run history database')
+    parser.add_argument('--no-record', action='store_true', help='Do not record this run in the run history')
+    add_profile_argument(parser)
+
     args = parser.parse_args()
-    
-    train(episodes=args.episodes, save_path=args.output, use_csv_data=not args.no_csv, csv_data_file=args.csv_file)
+    if args.alpha is None:
+        args.alpha = 0.1 if args.agent == "value" else 0.5
+
+    run = None
+    if not args.no_record:
+        from runlog import start_run
+        run = start_run("train", {k: v for k, v in vars(args).items() if k not in ("runs_db", "no_record", "record_games", "profile")}, args.runs_db)
+
+    evaluator = None
+    if args.eval_every:
+        from background_eval import BackgroundEvaluator
+        base, ext = os.path.splitext(args.output)
+        evaluator = BackgroundEvaluator(args.eval_every, args.eval_games, args.eval_perfect,
+                                        side_paths(f"{base}_best{ext}") if args.keep_best else None, run)
+
+    try:
+        with profiled(args.profile):
+            agent_X, agent_O = train(episodes=args.episodes, save_path=args.output, use_csv_data=not args.no_csv,
+                                     csv_data_file=args.csv_file, alpha=args.alpha, gamma=args.gamma,
+                                     epsilon_decay=args.epsilon_decay, min_epsilon=args.min_epsilon, run=run,
+                                     record_path=args.record_games, agent_type=args.agent,
+                                     agent_options=agent_options(args), evaluator=evaluator)
+    except BaseException:
+        if run is not None:
+            run.finish("failed")
+        raise
+
+    if run is not None:
+        from evaluate import score_agents
+        run.log_results(score_agents(agent_X, agent_O))
+        run.finish()
@@ -5,3 +5,67 @@ Utility functions shared across the TicTacToe RL project.
 def make_state_key(board_tuple, current_player):
     """Create a state key for Q-learning from board state and current player."""
     return (board_tuple, current_player)
+
+
+def encode_state(state_key):
+    """
+    Encode a state key as a small integer (base-3 board index, times 2, plus player bit).
+    All 3^9 boards for both players fit below 2 * 3^9 = 39366.
+    """
+    board, player = state_key
+    code = 0
+    for v in board:
+        code = code * 3 + (v % 3)  # 0 -> 0, 1 -> 1, -1 -> 2
+    return code * 2 + (1 if player == 1 else 0)
+
+
+def decode_state(code):
+    """Inverse of encode_state()."""
+    player = 1 if code & 1 else -1
+    code >>= 1
+    board = [0] * 9
+    for i in range(8, -1, -1):
+        code, v = divmod(code, 3)
+        board[i] = -1 if v == 2 else v
+    return (tuple(board), player)
+
+
+def _rotate(p):
+    # new[r][c] = old[2-c][r] (90 degrees clockwise)
+    return tuple(p[3 * (2 - c) + r] for r in range(3) for c in range(3))
+
+
+def _mirror(p):
+    # new[r][c] = old[r][2-c]
+    return tuple(p[3 * r + (2 - c)] for r in range(3) for c in range(3))
+
+
+def _symmetries():
+    perms, p = [], tuple(range(9))
+    for _ in range(4):
+        perms.extend([p, _mirror(p)])
+        p = _rotate(p)
+    return perms
+
+
+# The 8 symmetries of the board as index permutations: variant[i] = board[perm[i]]
+SYMMETRIES = _symmetries()
+
+
+def transform_board(board, perm):
+    return tuple(board[j] for j in perm)
+
+
+def canonical_state(state_key):
+    """
+    Canonical representative of a state's symmetry class.
+    Returns (canonical_key, perm); action i in the canonical board is action perm[i]
+    in the original one.
+    """
+    board, player = state_key
+    canonical, best_perm = None, None
+    for perm in SYMMETRIES:
+        variant = transform_board(board, perm)
+        if canonical is None or variant < canonical:
+            canonical, best_perm = variant, perm
+    return (canonical, player), best_perm
@@ -0,0 +1,210 @@
+"""
+Value-network agent for boards too large for a table.
+
+A small NumPy MLP (or a linear model with hidden=0) estimates the value of an
+afterstate, the board right after a move, from the mover's point of view. The
+input features are three planes over the cells: the mover's pieces, the
+opponent's pieces and the empty cells, so one network serves any board length
+and both sides. Choosing a move evaluates all afterstates of the legal moves as
+one batch (one matrix multiply per layer).
+
+Transitions from update() go into a fixed-size replay buffer; every update
+trains on a random mini-batch with vectorized TD(0) targets
+    r + gamma * max_a' V(afterstate')
+where the next position's value is negated when the opponent is to move there.
+Memory use is the parameters plus the replay buffer, independent of how many
+positions have been seen.
+
+NumPy is optional for the rest of the project; this module needs it.
+game.TicTacToe is 3x3, so train.py exercises the 9-cell case.
+"""
+
+import json
+import random
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # the tabular agents work without NumPy
+    np = None
+
+ZIP_MAGIC = b"PK\x03\x04"  # np.savez files are zip archives
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("ValueNetworkAgent needs NumPy (pip install numpy)")
+
+
+def board_features(boards, players):
+    """(B, cells) boards and (B,) movers -> (B, 3 * cells) float32 planes: own, opponent, empty."""
+    p = players[:, None]
+    return np.concatenate([boards == p, boards == -p, boards == 0], axis=1).astype(np.float32)
+
+
+class ValueNetworkAgent:
+    def __init__(self, alpha=0.1, gamma=0.99, epsilon=1.0, cells=9, hidden=64, batch_size=32,
+                 replay_size=20000, seed=None):
+        _require_numpy()
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.cells = cells
+        self.hidden = hidden
+        self.batch_size = batch_size
+        self.replay_size = replay_size
+        self.book = None
+        self.rng = np.random.default_rng(random.getrandbits(32) if seed is None else seed)
+
+        inputs = 3 * cells
+        if hidden:
+            self.params = {
+                "W1": (self.rng.standard_normal((inputs, hidden)) / np.sqrt(inputs)).astype(np.float32),
+                "b1": np.zeros(hidden, np.float32),
+                "W2": (self.rng.standard_normal((hidden, 1)) / np.sqrt(hidden)).astype(np.float32),
+                "b2": np.zeros(1, np.float32),
+            }
+        else:
+            self.params = {"W2": np.zeros((inputs, 1), np.float32), "b2": np.zeros(1, np.float32)}
+
+        # replay buffer (ring): afterstate features, reward, done, next position, sign of its value
+        self.replay_features = np.zeros((replay_size, inputs), np.float32)
+        self.replay_reward = np.zeros(replay_size, np.float32)
+        self.replay_done = np.zeros(replay_size, bool)
+        self.replay_next_board = np.zeros((replay_size, cells), np.int8)
+        self.replay_next_player = np.zeros(replay_size, np.int8)
+        self.replay_sign = np.zeros(replay_size, np.float32)
+        self.replay_count = 0
+
+    # --- inference -------------------------------------------------------
+
+    def _forward(self, X):
+        p = self.params
+        if self.hidden:
+            h = np.tanh(X @ p["W1"] + p["b1"])
+            return np.tanh(h @ p["W2"] + p["b2"])[:, 0], h
+        return np.tanh(X @ p["W2"] + p["b2"])[:, 0], None
+
+    def predict(self, boards, players):
+        """Values of a batch of afterstates, each from the view of the player who just moved."""
+        return self._forward(board_features(boards, players))[0]
+
+    def _afterstates(self, board, player, actions):
+        after = np.repeat(np.asarray(board, np.int8)[None], len(actions), axis=0)
+        after[np.arange(len(actions)), actions] = player
+        return after
+
+    def q_values(self, state_key: Tuple) -> Dict[int, float]:
+        """Value of every legal move's afterstate (one batched forward pass)."""
+        board, player = state_key
+        legal = [a for a, v in enumerate(board) if v == 0]
+        if not legal:
+            return {}
+        values = self.predict(self._afterstates(board, player, legal), np.full(len(legal), player, np.int8))
+        return dict(zip(legal, values.tolist()))
+
+    def greedy_actions(self, state_key: Tuple, legal: List[int]) -> List[int]:
+        row = self.q_values(state_key)
+        best = max(row[a] for a in legal)
+        return [a for a in legal if row[a] == best]
+
+    def start_episode(self):
+        pass
+
+    def get_action(self, state_key: Tuple, legal: List[int], training=True) -> int:
+        if training and not legal:
+            raise ValueError("No legal actions provided")
+        if training and random.random() < self.epsilon:
+            return random.choice(legal)
+        if self.book is not None:
+            solved = self.book.best_actions(state_key, legal)
+            if solved:
+                return random.choice(solved)
+        return random.choice(self.greedy_actions(state_key, legal))
+
+    # --- learning --------------------------------------------------------
+
+    def _targets(self, reward, done, next_boards, next_players, sign):
+        """Vectorized TD targets: all next afterstates of the batch go through one forward pass."""
+        open_cells = (next_boards == 0) & ~done[:, None]
+        rows, cols = np.nonzero(open_cells)
+        best = np.full(len(reward), -np.inf, np.float32)
+        if len(rows):
+            after = next_boards[rows].copy()
+            after[np.arange(len(rows)), cols] = next_players[rows]
+            np.maximum.at(best, rows, self.predict(after, next_players[rows]))
+        best[np.isinf(best)] = 0.0
+        return reward + self.gamma * sign * best * ~done
+
+    def _sgd_step(self, X, y):
+        """One gradient step on 0.5 * mean((V(X) - y)^2)."""
+        p = self.params
+        v, h = self._forward(X)
+        dv = ((v - y) * (1 - v * v) / len(y))[:, None].astype(np.float32)
+        if self.hidden:
+            dh = (dv @ p["W2"].T) * (1 - h * h)
+            p["W2"] -= self.alpha * (h.T @ dv)
+            p["b2"] -= self.alpha * dv.sum(axis=0)
+            p["W1"] -= self.alpha * (X.T @ dh)
+            p["b1"] -= self.alpha * dh.sum(axis=0)
+        else:
+            p["W2"] -= self.alpha * (X.T @ dv)
+            p["b2"] -= self.alpha * dv.sum(axis=0)
+
+    def update(self, state_key, action, reward, next_state_key, next_legal, done):
+        board, player = state_key
+        after = self._afterstates(board, player, [action])
+        features = board_features(after, np.array([player], np.int8))
+        next_board = np.asarray(next_state_key[0], np.int8)[None]
+        next_player = np.array([next_state_key[1]], np.int8)
+        # the next position's value is from the view of whoever moves there
+        sign = np.float32(1.0 if next_state_key[1] == player else -1.0)
+
+        i = self.replay_count % self.replay_size
+        self.replay_features[i] = features[0]
+        self.replay_reward[i] = reward
+        self.replay_done[i] = done
+        self.replay_next_board[i] = next_board[0]
+        self.replay_next_player[i] = next_player[0]
+        self.replay_sign[i] = sign
+        self.replay_count += 1
+
+        target = self._targets(np.array([reward], np.float32), np.array([done]), next_board, next_player,
+                               np.array([sign], np.float32))
+        td_error = float(target[0] - self._forward(features)[0][0])
+
+        size = min(self.replay_count, self.replay_size)
+        if size >= self.batch_size:
+            idx = self.rng.integers(0, size, self.batch_size)
+            y = self._targets(self.replay_reward[idx], self.replay_done[idx], self.replay_next_board[idx],
+                              self.replay_next_player[idx], self.replay_sign[idx])
+            self._sgd_step(self.replay_features[idx], y.astype(np.float32))
+        return td_error
+
+    # --- bookkeeping -----------------------------------------------------
+
+    def table_size(self) -> int:
+        """Number of parameters (there is no per-state table)."""
+        return sum(p.size for p in self.params.values())
+
+    value_count = table_size
+
+    def memory_bytes(self) -> int:
+        buffers = (self.replay_features, self.replay_reward, self.replay_done, self.replay_next_board,
+                   self.replay_next_player, self.replay_sign)
+        return sum(p.nbytes for p in self.params.values()) + sum(b.nbytes for b in buffers)
+
+    def save(self, path):
+        meta = {"alpha": self.alpha, "gamma": self.gamma, "cells": self.cells, "hidden": self.hidden,
+                "batch_size": self.batch_size, "replay_size": self.replay_size}
+        # a file object keeps np.savez from appending ".npz" to the path
+        with open(path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **self.params)
+
+    def load(self, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            params = {name: data[name] for name in data.files if name != "meta"}
+        self.__init__(meta["alpha"], meta["gamma"], self.epsilon, meta["cells"], meta["hidden"],
+                      meta["batch_size"], meta["replay_size"])
+        self.params = params